@@ -6,8 +6,11 @@ AI文本摘要工具 (AI Text Summarizer)
 它能帮助你从海量信息中快速提取核心要点，是应对信息过载的实用小工具。
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 
+from response_cache import ResponseCache, cached_completion_text, default_cache
+
 # 确保环境变量中设置了 OPENAI_API_KEY
 # client = OpenAI() 会自动使用这个环境变量
 try:
@@ -17,13 +20,40 @@ except Exception as e:
     print("请确保已设置 OPENAI_API_KEY 环境变量。")
     exit()
 
-def summarize_text(text: str, max_tokens: int = 150) -> str:
+# 构造系统提示，指导AI以简洁、中文、提取核心要点的方式进行摘要
+SYSTEM_PROMPT = "你是一个专业的文本分析师。请用简洁、流畅的中文，从用户提供的文本中提取并总结出最核心的3到5个要点。"
+
+# 长文本模式（map-reduce）的默认参数
+DEFAULT_CHUNK_TOKENS = 4000      # 每个片段的最大token数
+DEFAULT_CHUNK_OVERLAP = 100      # 相邻片段重叠的token数，避免在片段边界丢失上下文
+DEFAULT_PARTIAL_MAX_TOKENS = 300 # 每个片段摘要的最大长度
+DEFAULT_WORKERS = 4              # 同时进行的摘要请求数
+MAX_REDUCE_DEPTH = 8             # 逐层合并的最大轮数
+
+def _request_summary(text: str, max_tokens: int, cache) -> str:
+    """发送一次摘要请求并返回摘要文本，失败时抛出异常。"""
+    content = cached_completion_text(
+        cache,
+        client.chat.completions.create,
+        model="gpt-4.1-mini", # 使用高效模型
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"请总结以下文本:\n\n{text}"}
+        ],
+        max_tokens=max_tokens,
+        temperature=0.3, # 较低的温度以保证摘要的准确性
+    )
+    return content.strip()
+
+def summarize_text(text: str, max_tokens: int = 150, cache=None) -> str:
     """
     使用OpenAI模型对给定文本进行摘要。
 
     Args:
         text: 需要摘要的原始文本。
         max_tokens: 摘要的最大长度。
+        cache: 可选的 ResponseCache，相同的文本直接返回缓存的摘要；
+            默认使用环境变量 LLM_RESPONSE_CACHE 开启的缓存，未设置时不缓存。
 
     Returns:
         摘要后的文本。
@@ -33,26 +63,85 @@ def summarize_text(text: str, max_tokens: int = 150) -> str:
 
     print("正在生成摘要，请稍候...")
     
-    # 构造系统提示，指导AI以简洁、中文、提取核心要点的方式进行摘要
-    system_prompt = "你是一个专业的文本分析师。请用简洁、流畅的中文，从用户提供的文本中提取并总结出最核心的3到5个要点。"
-    
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini", # 使用高效模型
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"请总结以下文本:\n\n{text}"}
-            ],
-            max_tokens=max_tokens,
-            temperature=0.3, # 较低的温度以保证摘要的准确性
-        )
-        
-        summary = response.choices[0].message.content.strip()
+        summary = _request_summary(text, max_tokens, cache if cache is not None else default_cache())
         return summary
         
     except Exception as e:
         return f"摘要生成失败: {e}"
 
+def summarize_long_text(text: str, max_tokens: int = 150, chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+                        overlap: int = DEFAULT_CHUNK_OVERLAP, partial_max_tokens: int = DEFAULT_PARTIAL_MAX_TOKENS,
+                        workers: int = DEFAULT_WORKERS, cache=None, encoding_name: str = "cl100k_base") -> str:
+    """
+    对超长文本（如整本书）进行分层（map-reduce）摘要。
+
+    先按token预算把文本切成若干片段，用线程池并发摘要各片段（map），
+    再把片段摘要拼接起来，仍超出预算时继续切分、摘要，逐层合并（reduce），
+    直到能放进一个片段为止，最后生成最终摘要。文本本身不超出预算时只发送一次请求。
+    片段摘要的长度不超过 chunk_tokens 的四分之一，而片段本身至少有半个 chunk_tokens，
+    因此每一轮合并后文本至少缩短一半；某一轮没有变短或超过最大轮数时报错（返回"摘要生成失败"），
+    不会把超出预算的文本作为一次请求发出。
+
+    中间摘要都经过缓存：传入 ResponseCache（或设置 LLM_RESPONSE_CACHE）时，
+    某个片段失败后重新调用，已完成的片段直接从缓存读取，不会重复请求；
+    否则中间摘要只缓存在本次调用的内存中。
+
+    Args:
+        text: 需要摘要的原始文本。
+        max_tokens: 最终摘要的最大长度。
+        chunk_tokens: 每个片段的最大token数。
+        overlap: 相邻片段重叠的token数（只用于第一层切分）。
+        partial_max_tokens: 每个片段摘要的最大长度（不超过 chunk_tokens 的四分之一）。
+        workers: 同时进行的摘要请求数。
+        cache: ResponseCache；默认使用环境变量 LLM_RESPONSE_CACHE 开启的缓存，
+            未开启时最终摘要不缓存，中间摘要使用仅在本次调用中有效的内存缓存。
+        encoding_name: 切分时使用的tiktoken编码名称。
+
+    Returns:
+        摘要后的文本。
+    """
+    if not text:
+        return "输入文本为空，无法生成摘要。"
+
+    # 只有长文本模式需要 tiktoken，按需导入
+    from token_counter import iter_token_chunks
+
+    if cache is None:
+        cache = default_cache()
+    # 未开启缓存时，中间摘要只在本次调用内复用，不写入磁盘
+    chunk_cache = cache if cache is not None else ResponseCache(':memory:')
+
+    try:
+        current = text
+        # 片段至少有半个窗口长，摘要不超过四分之一个窗口，保证每轮至少缩短一半
+        budget = min(partial_max_tokens, chunk_tokens // 4)
+        if budget < 1:
+            raise ValueError(f"chunk_tokens={chunk_tokens} 太小，无法容纳片段摘要")
+        previous_tokens = None
+        for depth in range(MAX_REDUCE_DEPTH + 1):
+            chunks = list(iter_token_chunks(current, chunk_tokens, overlap if depth == 0 else 0, encoding_name))
+            if len(chunks) <= 1:
+                break
+            tokens = chunks[-1].token_end
+            if depth == MAX_REDUCE_DEPTH:
+                raise ValueError(f"经过 {MAX_REDUCE_DEPTH} 轮合并后仍有 {tokens} 个token，超出 chunk_tokens={chunk_tokens}")
+            if previous_tokens is not None and tokens >= previous_tokens:
+                raise ValueError(f"合并后的文本没有变短（{previous_tokens} → {tokens} 个token），无法继续合并")
+            previous_tokens = tokens
+            print(f"第 {depth + 1} 轮：正在并发摘要 {len(chunks)} 个片段...")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                partials = list(executor.map(lambda chunk: _request_summary(chunk.text, budget, chunk_cache), chunks))
+            current = "\n\n".join(partials)
+
+        print("正在生成最终摘要，请稍候...")
+        return _request_summary(current, max_tokens, cache)
+    except Exception as e:
+        return f"摘要生成失败: {e}"
+    finally:
+        if chunk_cache is not cache:
+            chunk_cache.close()
+
 # --- 示例用法 ---
 if __name__ == "__main__":
     # 模拟一篇关于“AI Agent”的科技新闻或博客文章
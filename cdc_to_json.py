@@ -1,16 +1,17 @@
 # -*- coding: utf-8 -*-
 # 文件名: cdc_to_json.py
 
-import json
 from datetime import datetime
 
+import json_backend
+
 # 模拟从PostgreSQL CDC（Change Data Capture）流中接收到的数据记录
 # 实际应用中，这可能是一个Kafka消息、RabbitMQ队列消息或直接的数据库通知
 def simulate_cdc_record(table_name, operation, old_data, new_data):
     """
     模拟一条CDC记录。
     :param table_name: 发生变化的表名
-    :param operation: 操作类型 (\'INSERT\', \'UPDATE\', \'DELETE\')
+    :param operation: 操作类型 ('INSERT', 'UPDATE', 'DELETE')
     :param old_data: 旧数据 (仅UPDATE和DELETE有)
     :param new_data: 新数据 (仅INSERT和UPDATE有)
     :return: 结构化的CDC记录字典
@@ -22,12 +23,12 @@ def simulate_cdc_record(table_name, operation, old_data, new_data):
         "payload": {}
     }
 
-    if operation == \'INSERT\':
+    if operation == 'INSERT':
         record["payload"]["after"] = new_data
-    elif operation == \'UPDATE\':
+    elif operation == 'UPDATE':
         record["payload"]["before"] = old_data
         record["payload"]["after"] = new_data
-    elif operation == \'DELETE\':
+    elif operation == 'DELETE':
         record["payload"]["before"] = old_data
     
     return record
@@ -42,7 +43,7 @@ def process_cdc_to_json(cdc_record):
     cdc_record["processed_at"] = datetime.now().isoformat()
     
     # 转换为JSON字符串
-    json_output = json.dumps(cdc_record, indent=4, ensure_ascii=False)
+    json_output = json_backend.dumps(cdc_record, indent=4)
     return json_output
 
 # --- 示例数据 ---
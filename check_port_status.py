@@ -1,50 +1,425 @@
 # -*- coding: utf-8 -*-
+import argparse
+import asyncio
+import errno
+import os
 import socket
 import sys
+import tempfile
+import threading
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，此时跨进程锁退化为空操作
+    fcntl = None
+
+import json_backend
 
 # 这是Muimill今天摘给你的小星星～希望你喜欢。
 
+# 扫描模式：bind 检查本机端口能否绑定，connect 检查目标主机端口能否连通
+SCAN_MODES = ('bind', 'connect', 'both')
+DEFAULT_CONCURRENCY = 500
+DEFAULT_TIMEOUT = 0.5
+# 端口分配器的跨进程锁文件目录，同一主机上的所有工作进程共用
+DEFAULT_LOCK_DIR = os.path.join(tempfile.gettempdir(), "check_port_status_locks")
+
+def probe_bind(port, host="0.0.0.0"):
+    """
+    尝试绑定端口，不输出任何信息。
+
+    :return: (是否可用, 错误信息或None)
+    """
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind((host, port))
+        return True, None
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            return False, None
+        return False, str(e)
+    finally:
+        s.close()
+
 def check_port(port):
     """
     检查指定的端口是否可用。
     尝试创建一个socket并绑定到该端口。如果成功，则端口可用；否则，端口已被占用。
     """
     try:
-        # 创建一个TCP socket
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        # 设置SO_REUSEADDR选项，允许重新使用本地地址
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        # 尝试绑定到指定的端口和所有网络接口
-        s.bind(("0.0.0.0", port))
-        s.close()
-        print(f"端口 {port} 可用。")
-        return True
-    except OSError as e:
-        # 端口被占用时会抛出OSError
-        if "Address already in use" in str(e):
+        available, error = probe_bind(port)
+        if available:
+            print(f"端口 {port} 可用。")
+            return True
+        if error is None:
+            # 端口被占用
             print(f"端口 {port} 已被占用。")
-            return False
         else:
             # 其他错误，例如权限不足
-            print(f"检查端口 {port} 时发生错误: {e}")
-            return False
+            print(f"检查端口 {port} 时发生错误: {error}")
+        return False
     except Exception as e:
         print(f"发生未知错误: {e}")
         return False
 
-if __name__ == "__main__":
-    # 检查命令行参数
-    if len(sys.argv) != 2:
-        print("用法: python3 check_port_status.py <端口号>")
-        sys.exit(1)
+def parse_port_spec(spec):
+    """
+    解析端口列表/范围，例如 "8000-9000,5432"。
+
+    :return: 去重并排序后的端口列表。
+    :raises ValueError: 格式错误或端口超出 1~65535。
+    """
+    ports = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(p) for p in part.split('-', 1))
+            if start > end:
+                raise ValueError(f"端口范围无效: {part}")
+            ports.update(range(start, end + 1))
+        else:
+            ports.add(int(part))
+    if not ports:
+        raise ValueError("未指定任何端口")
+    if min(ports) < 1 or max(ports) > 65535:
+        raise ValueError("端口号必须在 1 到 65535 之间。")
+    return sorted(ports)
+
+async def resolve_host(host):
+    """
+    解析目标主机，返回去重后的 [(地址族, sockaddr), ...]，同时包含IPv4和IPv6地址。
+
+    :raises ValueError: 主机无法解析。
+    """
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=socket.AF_UNSPEC,
+                                                              type=socket.SOCK_STREAM)
+    except OSError as e:
+        raise ValueError(f"无法解析主机 {host}: {e}") from e
+    addresses = []
+    for family, _, _, _, sockaddr in infos:
+        if (family, sockaddr) not in addresses:
+            addresses.append((family, sockaddr))
+    if not addresses:
+        raise ValueError(f"无法解析主机 {host}")
+    return addresses
+
+async def probe_connect(host, port, timeout, family=socket.AF_INET, sockaddr=None):
+    """
+    尝试连接目标端口，返回是否可连通。
+    host 应为IP地址：传入主机名时每次调用都会在线程池中做一次DNS解析，批量扫描请先用 resolve_host 解析好。
 
+    :param family: 地址族，IPv6地址需传入 socket.AF_INET6。
+    :param sockaddr: 可选，resolve_host 返回的sockaddr；IPv6的 flowinfo/scope_id 从中取得。
+    """
+    address = (host, port) if sockaddr is None else (sockaddr[0], port) + tuple(sockaddr[2:])
+    # 直接使用非阻塞socket，省去创建 StreamReader/StreamWriter 的开销
+    s = socket.socket(family, socket.SOCK_STREAM)
+    s.setblocking(False)
     try:
-        port_to_check = int(sys.argv[1])
-        if 0 < port_to_check < 65536:
-            check_port(port_to_check)
+        connect = asyncio.get_running_loop().sock_connect(s, address)
+        if hasattr(asyncio, 'timeout'):
+            # Python 3.11+：asyncio.timeout 不需要像 wait_for 那样额外创建任务
+            async with asyncio.timeout(timeout):
+                await connect
         else:
-            print("端口号必须在 1 到 65535 之间。")
+            await asyncio.wait_for(connect, timeout)
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        s.close()
+
+async def scan_ports_async(ports, host="127.0.0.1", mode='both', concurrency=DEFAULT_CONCURRENCY,
+                           timeout=DEFAULT_TIMEOUT, bind_host="0.0.0.0"):
+    """
+    并发检查一组端口。
+
+    :param ports: 端口列表。
+    :param host: connect 检查的目标主机。
+    :param mode: 'bind'、'connect' 或 'both'。
+    :param concurrency: 同时进行的连接数上限。
+    :param timeout: 每个连接的超时时间（秒）。
+    :param bind_host: bind 检查绑定的本机地址。
+    :return: 每个端口一个字典的列表，例如 {"port": 8000, "available": true, "reachable": false}。
+             主机有多个地址（如 localhost 的 ::1 和 127.0.0.1）时，任一地址可连通即为 reachable。
+    :raises ValueError: 参数无效，或 connect 检查的目标主机无法解析。
+    """
+    if mode not in SCAN_MODES:
+        raise ValueError(f"不支持的扫描模式: {mode}")
+    if concurrency < 1:
+        raise ValueError("concurrency 必须大于等于 1")
+    results = [{"port": port} for port in ports]
+
+    if mode in ('bind', 'both'):
+        # bind 是本地的非阻塞系统调用，逐个执行即可，无需占用事件循环的并发额度
+        for result in results:
+            available, error = probe_bind(result["port"], bind_host)
+            result["available"] = available
+            if error:
+                result["error"] = error
+
+    if mode in ('connect', 'both'):
+        # 主机名只解析一次，否则 sock_connect 会为每个端口在线程池中调用一次 getaddrinfo
+        addresses = await resolve_host(host)
+
+        # 固定数量的工作协程从共享迭代器中取端口，限制并发的同时避免为每个端口创建任务
+        pending = iter(results)
+
+        async def worker():
+            for result in pending:
+                reachable = False
+                for family, sockaddr in addresses:
+                    if await probe_connect(sockaddr[0], result["port"], timeout, family, sockaddr):
+                        reachable = True
+                        break
+                result["reachable"] = reachable
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(results)))))
+    return results
+
+def scan_ports(ports, host="127.0.0.1", mode='both', concurrency=DEFAULT_CONCURRENCY,
+               timeout=DEFAULT_TIMEOUT, bind_host="0.0.0.0"):
+    """scan_ports_async 的同步包装。"""
+    return asyncio.run(scan_ports_async(ports, host, mode, concurrency, timeout, bind_host))
+
+class PortAllocator:
+    """
+    空闲端口分配器，供测试框架等需要反复申请端口的场景使用。
+
+    - 一次调用分配N个端口，分配出的端口由已绑定的socket占住，直到调用方 take() 取走；
+    - 同一主机上的多个工作进程通过锁文件（fcntl.flock）互斥，不会拿到同一个端口，
+      进程退出时锁自动释放，不会留下失效的锁；
+    - release() 归还的端口进入最近释放缓存，下次分配优先直接复用，无需重新探测。
+
+    预留只在分配器存活期间有效。命令行的 --allocate 不加 --hold 时进程退出即释放，
+    测试框架应在进程内使用本类，或通过 --allocate N --hold 让命令行进程一直持有预留。
+
+    用法示例::
+
+        with PortAllocator() as allocator:
+            ports = allocator.allocate(3)
+            port = allocator.take(ports[0])   # 释放占位socket，调用方立即绑定
+            ...
+            allocator.release(port)
+    """
+
+    def __init__(self, host="0.0.0.0", lock_dir=DEFAULT_LOCK_DIR, freed_cache_size=256):
+        self.host = host
+        self.lock_dir = lock_dir
+        if not os.path.isdir(lock_dir):
+            os.makedirs(lock_dir, exist_ok=True)
+            try:
+                # 与 /tmp 相同的权限：同一主机上的所有用户都能在其中创建锁文件
+                os.chmod(lock_dir, 0o1777)
+            except OSError:
+                pass
+        self._reserved = {}  # 端口 -> (占位socket, 锁文件描述符)
+        self._taken = {}  # 端口 -> 锁文件描述符
+        self._freed = deque(maxlen=freed_cache_size)
+        self._lock = threading.Lock()
+
+    def _lock_port(self, port):
+        """获取端口的跨进程锁，成功返回文件描述符，已被其他进程持有或无权访问锁文件时返回None。"""
+        path = os.path.join(self.lock_dir, f"{port}.lock")
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        except PermissionError:
+            # 锁文件由其他用户创建（共享的临时目录），flock 只需要只读打开
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                return None
+        if fcntl is None:
+            return fd
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            os.close(fd)
+            return None
+
+    def _bind(self, port):
+        """绑定端口作为占位。不设置 SO_REUSEADDR，使其他进程无法绑定同一端口。"""
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            s.bind((self.host, port))
+            return s
+        except OSError:
+            s.close()
+            return None
+
+    def _reserve(self, port):
+        """锁定并绑定指定端口，成功时登记为已预留。"""
+        if port in self._reserved or port in self._taken:
+            return False
+        fd = self._lock_port(port)
+        if fd is None:
+            return False
+        s = self._bind(port)
+        if s is None:
+            os.close(fd)
+            return False
+        self._reserved[port] = (s, fd)
+        return True
+
+    def _reserve_ephemeral(self, rejected):
+        """让内核分配一个空闲端口并加锁；锁被占用时先保留socket避免内核再次分配同一端口。"""
+        s = self._bind(0)
+        if s is None:
+            return None
+        port = s.getsockname()[1]
+        try:
+            fd = self._lock_port(port)
+        except OSError:
+            s.close()
+            raise
+        if fd is None:
+            rejected.append(s)
+            return None
+        self._reserved[port] = (s, fd)
+        return port
+
+    def allocate(self, n=1, port_range=None):
+        """
+        分配N个空闲端口并保持占用，直到调用 take() 或 release()。
+
+        :param n: 需要的端口数量。
+        :param port_range: 可选的候选端口范围（如 range(20000, 30000)），默认由内核分配。
+        :return: 端口列表。
+        :raises RuntimeError: 没有足够的空闲端口。
+        :raises OSError: 无法创建锁文件等；本次已预留的端口会全部归还。
+        """
+        ports = []
+        rejected = []
+        with self._lock:
+            try:
+                # 优先复用最近释放的端口，不需要重新扫描
+                while self._freed and len(ports) < n:
+                    port = self._freed.popleft()
+                    if (port_range is None or port in port_range) and self._reserve(port):
+                        ports.append(port)
+
+                if port_range is not None:
+                    for port in port_range:
+                        if len(ports) >= n:
+                            break
+                        if self._reserve(port):
+                            ports.append(port)
+                else:
+                    attempts = 0
+                    while len(ports) < n and attempts < n * 10:
+                        attempts += 1
+                        port = self._reserve_ephemeral(rejected)
+                        if port is not None:
+                            ports.append(port)
+
+                if len(ports) < n:
+                    raise RuntimeError(f"没有足够的空闲端口：需要 {n} 个，只找到 {len(ports)} 个")
+            except BaseException:
+                # 分配失败时归还本次已预留的端口，不留下占位socket和锁
+                for port in ports:
+                    s, fd = self._reserved.pop(port)
+                    s.close()
+                    os.close(fd)
+                raise
+            finally:
+                for s in rejected:
+                    s.close()
+        return ports
+
+    def take(self, port):
+        """
+        取走一个已预留的端口：关闭占位socket以便调用方绑定，跨进程锁保持到 release()。
+        """
+        with self._lock:
+            s, fd = self._reserved.pop(port)
+            s.close()
+            self._taken[port] = fd
+        return port
+
+    def release(self, port):
+        """归还端口：释放跨进程锁，并放入最近释放缓存供下次直接复用。"""
+        with self._lock:
+            if port in self._reserved:
+                s, fd = self._reserved.pop(port)
+                s.close()
+            else:
+                fd = self._taken.pop(port)
+            os.close(fd)
+            self._freed.append(port)
+
+    def close(self):
+        """释放所有预留和已取走的端口。"""
+        for port in list(self._reserved) + list(self._taken):
+            self.release(port)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="检查端口是否可用；支持端口列表/范围的并发扫描。")
+    parser.add_argument("ports", nargs="?", help="端口号，或端口列表/范围，例如 8000-9000,5432")
+    parser.add_argument("--host", default="127.0.0.1", help="connect 检查的目标主机，默认 127.0.0.1")
+    parser.add_argument("--mode", choices=SCAN_MODES, default='both', help="扫描模式，默认 both")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"并发连接数上限，默认 {DEFAULT_CONCURRENCY}")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"每个连接的超时（秒），默认 {DEFAULT_TIMEOUT}")
+    parser.add_argument("--json", action="store_true", help="即使只有一个端口也以JSON扫描结果输出")
+    parser.add_argument("--allocate", type=int, metavar="N",
+                        help="分配N个空闲端口（可与端口范围一起使用，限定候选范围）。"
+                             "不加 --hold 时进程退出即释放预留，输出的只是当时空闲的端口；"
+                             "测试框架需要跨进程互斥时请使用 --hold 或进程内的 PortAllocator")
+    parser.add_argument("--hold", action="store_true",
+                        help="配合 --allocate：输出端口后一直持有预留，直到标准输入关闭；"
+                             "从标准输入读到某个端口号时关闭它的占位socket供调用方绑定，跨进程锁保持到退出")
+    args = parser.parse_args()
+
+    if args.allocate:
+        try:
+            candidates = parse_port_spec(args.ports) if args.ports else None
+            with PortAllocator() as allocator:
+                ports = allocator.allocate(args.allocate, candidates)
+                print(json_backend.dumps(ports), flush=True)
+                if args.hold:
+                    for line in sys.stdin:
+                        line = line.strip()
+                        if line.isdigit() and int(line) in ports:
+                            try:
+                                allocator.take(int(line))
+                            except KeyError:
+                                pass  # 已经取走过
+                        elif line:
+                            print(f"忽略无效的端口: {line}", file=sys.stderr)
+        except (ValueError, RuntimeError, OSError) as e:
+            print(f"端口分配失败: {e}")
             sys.exit(1)
-    except ValueError:
-        print("端口号必须是有效的整数。")
+        sys.exit(0)
+    if not args.ports:
+        parser.error("需要指定端口号或使用 --allocate")
+
+    try:
+        port_list = parse_port_spec(args.ports)
+    except ValueError as e:
+        print(f"端口参数无效: {e}")
         sys.exit(1)
+
+    if len(port_list) == 1 and not args.json and args.ports.strip().isdigit():
+        # 单个端口保持原有的输出方式
+        check_port(port_list[0])
+    else:
+        try:
+            results = scan_ports(port_list, args.host, args.mode, args.concurrency, args.timeout)
+        except ValueError as e:
+            print(f"扫描失败: {e}")
+            sys.exit(1)
+        print(json_backend.dumps(results, indent=2))
@@ -9,11 +9,14 @@
 这对于任何需要读取和验证配置文件的项目都非常实用。
 """
 
+import glob
 import json
+import os
+import sys
+import time
 from pydantic import BaseModel, Field, ValidationError
-from rich.console import Console
-from rich.panel import Panel
-from rich.pretty import pprint
+
+import json_backend
 
 # 1. 定义配置模型 (Pydantic BaseModel)
 # 假设我们有一个项目配置，包含数据库连接信息和一些通用设置
@@ -38,7 +41,7 @@ def load_config(file_path: str) -> dict:
     """从JSON文件加载配置数据"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return json_backend.load(f)
     except FileNotFoundError:
         return {}
     except json.JSONDecodeError:
@@ -47,6 +50,11 @@ def load_config(file_path: str) -> dict:
 # 3. 验证和输出
 def validate_and_display_config():
     """验证配置并使用 Rich 输出结果"""
+    # Rich 只在需要渲染时才导入，避免拖慢作为启动钩子时的冷启动
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.pretty import pprint
+
     console = Console()
     raw_config = load_config(CONFIG_FILE_PATH)
 
@@ -80,5 +88,85 @@ def validate_and_display_config():
         # 打印 Pydantic 提供的详细错误报告
         pprint(e.errors(), console=console)
 
+# 4. 批量验证
+def iter_config_documents(source: str):
+    """
+    逐个产出待验证的配置文档 (来源标识, 原始字节)。
+
+    :param source: 目录（递归读取其中所有 .json 文件，每个文件一个配置），
+                   或NDJSON文件（每行一个配置），'-' 表示从标准输入读取NDJSON。
+    """
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, '**', '*.json'), recursive=True)):
+            with open(path, 'rb') as f:
+                yield path, f.read()
+        return
+
+    stream = sys.stdin.buffer if source == '-' else open(source, 'rb')
+    try:
+        for lineno, line in enumerate(stream, 1):
+            line = line.strip()
+            if line:
+                yield f"{source}:{lineno}", line
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+def validate_config_batch(source: str) -> dict:
+    """
+    批量验证大量配置文档，返回机器可读的汇总结果。
+
+    直接对原始字节调用 model_validate_json，由 pydantic-core 一次完成
+    JSON解析和模型验证，省去 json.load 再解包成字典的开销。
+
+    :return: {"total", "valid", "invalid", "seconds", "failures": [{"source", "errors"}]}
+    """
+    total = 0
+    failures = []
+    start = time.perf_counter()
+    for name, raw in iter_config_documents(source):
+        total += 1
+        try:
+            ProjectConfig.model_validate_json(raw)
+        except ValidationError as e:
+            failures.append({"source": name, "errors": json_backend.loads(e.json(include_url=False))})
+    return {
+        "total": total,
+        "valid": total - len(failures),
+        "invalid": len(failures),
+        "seconds": round(time.perf_counter() - start, 3),
+        "failures": failures,
+    }
+
+def display_batch_failures(failures: list):
+    """只为验证失败的配置使用 Rich 渲染错误详情（输出到标准错误）。"""
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.pretty import pprint
+
+    console = Console(stderr=True)
+    for failure in failures:
+        console.print(Panel(
+            f"[bold red]配置验证失败！[/bold red] 来源: [cyan]{failure['source']}[/cyan]",
+            title="[bold yellow]配置验证结果[/bold yellow]",
+            border_style="red"
+        ))
+        pprint(failure["errors"], console=console)
+
 if __name__ == "__main__":
-    validate_and_display_config()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="使用 Pydantic 验证项目配置。")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="批量验证：目录（每个 .json 文件一个配置）或NDJSON文件，'-' 表示标准输入")
+    args = parser.parse_args()
+
+    if args.batch:
+        result = validate_config_batch(args.batch)
+        if result["failures"]:
+            display_batch_failures(result["failures"])
+        # 标准输出只包含JSON汇总，便于其他程序解析
+        print(json_backend.dumps(result))
+        sys.exit(1 if result["invalid"] else 0)
+    else:
+        validate_and_display_config()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+csv_check.py - CSV转JSON的回归检查
+
+在临时目录中生成几份容易出错的CSV（多余字段的行、日期列等），
+用 csv_to_json.py 的各种输出格式和 csv_to_json_oneliner.py 的各个引擎转换，
+检查输出是合法JSON且内容符合预期。未安装的引擎（pandas/pyarrow）会被跳过。
+任何一项不通过时以非零状态码退出，可直接作为CI中的门禁。
+
+用法示例:
+    python csv_check.py
+
+这是Muimill今天摘给你的小星星～希望你喜欢。
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+import csv_to_json_oneliner
+import json_backend
+from csv_to_json import csv_to_json, csv_to_json_parallel
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+def _convert(func, *args, **kwargs):
+    """调用转换函数并吞掉它打印的成功信息，转换失败（sys.exit）时返回False。"""
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args, **kwargs)
+        return True
+    except SystemExit:
+        return False
+
+@contextlib.contextmanager
+def _stdlib_json():
+    """临时只使用标准库JSON后端：orjson 能序列化的对象（如datetime）在标准库下会报错。"""
+    saved, json_backend.orjson = json_backend.orjson, None
+    try:
+        yield
+    finally:
+        json_backend.orjson = saved
+
+def _available_engines():
+    engines = ['csv']
+    if csv_to_json_oneliner.pd is not None:
+        engines.append('pandas')
+    if csv_to_json_oneliner.pa_csv is not None:
+        engines.append('pyarrow')
+    return engines
+
+def _report(name, ok, detail=''):
+    print(f"{'✅' if ok else '❌'} {name}{': ' + detail if detail else ''}")
+    return ok
+
+def _load(path):
+    """读取输出文件，不是合法JSON时返回None。"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return None
+
+def check_ragged_rows(tmp):
+    """字段数多于表头的行：紧凑布局中多余字段与逐行记录一样放在 "null" 列下。"""
+    src = os.path.join(tmp, 'ragged.csv')
+    _write(src, 'a,b\n1,2\n3,4,5\n')
+    expected = {
+        'columns': {"a": [1, 3], "b": [2, 4], "null": [None, ["5"]]},
+        'rows': {"columns": ["a", "b", "null"], "rows": [[1, 2, None], [3, 4, ["5"]]]},
+    }
+    results = []
+    for output_format, want in expected.items():
+        out = os.path.join(tmp, f'ragged.{output_format}.json')
+        ok = _convert(csv_to_json, src, out, output_format)
+        got = _load(out) if ok else None
+        results.append(_report(f"多余字段的行（{output_format}）", got == want, f"输出 {got!r}"))
+    return all(results)
+
+def check_date_column(tmp):
+    """ISO格式的日期/时间列：各引擎都按原始文本输出，不依赖JSON后端能否序列化datetime。"""
+    src = os.path.join(tmp, 'dates.csv')
+    _write(src, 'id,day,at\n1,2024-01-02,2024-01-02 03:04:05\n2,2024-02-03,2024-02-03 00:00:00\n')
+    want_days = ["2024-01-02", "2024-02-03"]
+    want_times = ["2024-01-02 03:04:05", "2024-02-03 00:00:00"]
+    results = []
+    for engine in _available_engines():
+        out = os.path.join(tmp, f'dates.{engine}.json')
+        try:
+            with _stdlib_json():
+                csv_to_json_oneliner.csv_to_json_stream(src, out, engine=engine)
+            rows = _load(out)
+        except Exception as e:
+            rows = None
+            print(f"   {engine}: {type(e).__name__}: {e}")
+        ok = (rows is not None and [r["day"] for r in rows] == want_days
+              and [r["at"] for r in rows] == want_times)
+        results.append(_report(f"日期列（{engine} 引擎）", ok, f"输出 {rows!r}"))
+    return all(results)
+
+def check_parallel_edge_cases(tmp):
+    """空文件、只有BOM、只有表头等边界输入：多进程模式的输出与单进程逐字节一致。"""
+    inputs = {
+        '空文件': b'',
+        '只有BOM': b'\xef\xbb\xbf',
+        '只有表头（无换行）': b'a,b',
+        '只有表头': b'a,b\n',
+        '少量数据行': b'a,b\n1,"x\ny"\n3,4\n',
+    }
+    results = []
+    for name, data in inputs.items():
+        src = os.path.join(tmp, 'edge.csv')
+        with open(src, 'wb') as f:
+            f.write(data)
+        outputs = []
+        for i, (func, args) in enumerate([(csv_to_json, ()), (csv_to_json_parallel, (2,))]):
+            out = os.path.join(tmp, f'edge.{i}.json')
+            if not _convert(func, src, out, *args, **({'chunk_size': 4} if args else {})):
+                outputs.append(None)
+                continue
+            with open(out, 'rb') as f:
+                outputs.append(f.read())
+        ok = outputs[0] is not None and outputs[0] == outputs[1]
+        results.append(_report(f"多进程边界输入（{name}）", ok, f"单进程 {outputs[0]!r}，多进程 {outputs[1]!r}"))
+    return all(results)
+
+CHECKS = [check_ragged_rows, check_date_column, check_parallel_edge_cases]
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [check(tmp) for check in CHECKS]
+    sys.exit(0 if all(results) else 1)
@@ -1,28 +1,330 @@
 # -*- coding: utf-8 -*-
+import argparse
 import csv
-import json
+import io
+import os
+import re
 import sys
+from multiprocessing import Pool
 
-def csv_to_json(csv_filepath, json_filepath):
+import json_backend
+
+# 默认写缓冲区大小（字节），大文件时减少系统调用次数
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# 每处理多少行回调一次进度
+PROGRESS_INTERVAL = 10000
+# 并行模式下每个分块的目标大小（字节）
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+# 扫描分块边界时每次读取的字节数
+SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+UTF8_BOM = b'\xef\xbb\xbf'
+# 流式输出格式与紧凑（列式）输出格式
+STREAM_FORMATS = ('json', 'ndjson')
+COMPACT_FORMATS = ('columns', 'rows')
+OUTPUT_FORMATS = STREAM_FORMATS + COMPACT_FORMATS
+
+# 类型推断使用的正则：带前导零的数字（如邮编 "007"）保持为字符串
+_INT_RE = re.compile(r'-?(0|[1-9][0-9]*)')
+_FLOAT_RE = re.compile(r'-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?')
+_BOOL_VALUES = {'true': True, 'false': False}
+
+def format_row(row, output_format='json'):
+    """
+    将单行数据序列化为JSON文本片段。
+    json格式下与 json.dump(data, indent=4) 中数组元素的缩进完全一致；
+    ndjson格式下每行一个紧凑的JSON对象。
+    """
+    if output_format == 'ndjson':
+        return json_backend.dumps(row) + '\n'
+    # JSON字符串中的换行都会被转义，因此按行加缩进是安全的
+    return '    ' + json_backend.dumps(row, indent=4).replace('\n', '\n    ')
+
+def _infer_value_type(value):
+    """推断单个CSV字符串值的类型：'null'、'bool'、'int'、'float' 或 'str'。"""
+    if value is None or value == '':
+        return 'null'
+    if value.lower() in _BOOL_VALUES:
+        return 'bool'
+    if _INT_RE.fullmatch(value):
+        return 'int'
+    if _FLOAT_RE.fullmatch(value):
+        return 'float'
+    return 'str'
+
+def _merge_types(current, new):
+    """合并同一列的两个类型：null可与任意类型合并，int与float合并为float，其余冲突退化为str。"""
+    if current == new or new == 'null':
+        return current
+    if current == 'null':
+        return new
+    if {current, new} == {'int', 'float'}:
+        return 'float'
+    return 'str'
+
+def _convert_value(value, column_type):
+    """按列类型转换CSV字符串值，空字符串在非字符串列中转为None。"""
+    if column_type == 'str':
+        return value
+    if value is None or value == '':
+        return None
+    if column_type == 'bool':
+        return _BOOL_VALUES[value.lower()]
+    if column_type == 'int':
+        return int(value)
+    if column_type == 'float':
+        return float(value)
+    return value
+
+def _column_name(key):
+    """
+    将列名统一为字符串。csv.DictReader 把超出表头的多余字段放在键None下，
+    这里与逐行输出的记录格式一样写为 "null"，保证紧凑布局输出的仍是合法JSON。
+    """
+    return key if isinstance(key, str) else json_backend.dumps(key)
+
+def collect_columns(rows, infer_types=True, fieldnames=None):
+    """
+    单次遍历收集所有行，按列存储并同时推断每一列的类型。
+
+    :param rows: 可迭代的行（字典），通常来自 csv.DictReader。
+    :param infer_types: 是否对字符串值做类型推断；对已带类型的数据传入False。
+    :param fieldnames: 可选的已知列名，保证没有数据行时也能输出表头。
+    :return: (列名列表, 每列的值列表)。
+    """
+    fieldnames = [_column_name(key) for key in fieldnames or []]
+    columns = {key: [] for key in fieldnames}
+    types = {key: 'null' for key in fieldnames}
+    count = 0
+    for row in rows:
+        for key, value in row.items():
+            if not isinstance(key, str):
+                key = _column_name(key)
+            if key not in columns:
+                # 新出现的列，之前的行用None补齐
+                fieldnames.append(key)
+                columns[key] = [None] * count
+                types[key] = 'null'
+            columns[key].append(value)
+            if infer_types and isinstance(value, str):
+                types[key] = _merge_types(types[key], _infer_value_type(value))
+        count += 1
+        for key in fieldnames:
+            if len(columns[key]) < count:
+                columns[key].append(None)
+    if infer_types:
+        for key in fieldnames:
+            column_type = types[key]
+            columns[key] = [_convert_value(v, column_type) if isinstance(v, str) else v
+                            for v in columns[key]]
+    return fieldnames, [columns[key] for key in fieldnames]
+
+def write_compact_json(fieldnames, columns, jsonfile, output_format='columns'):
+    """
+    以紧凑布局写出数据，表头只出现一次。
+
+    - 'columns'：{"列名": [值, ...], ...}，每列一行；
+    - 'rows'：{"columns": [...], "rows": [[...], ...]}，每行数据一行。
+    """
+    def dumps(value):
+        return json_backend.dumps(value, separators=(',', ':'))
+
+    if output_format == 'columns':
+        jsonfile.write('{')
+        for i, (key, values) in enumerate(zip(fieldnames, columns)):
+            jsonfile.write(f"{',' if i else ''}\n{dumps(key)}:{dumps(values)}")
+        jsonfile.write('\n}' if fieldnames else '}')
+        return
+    jsonfile.write(f'{{"columns":{dumps(fieldnames)},\n"rows":[')
+    for i, row in enumerate(zip(*columns)):
+        jsonfile.write(f"{',' if i else ''}\n{dumps(list(row))}")
+    jsonfile.write('\n]}' if columns and columns[0] else ']}')
+
+def write_json_rows(rows, jsonfile, output_format='json', progress_callback=None,
+                    progress_interval=PROGRESS_INTERVAL):
+    """
+    逐行将数据写入已打开的文件对象，内存占用与输入大小无关。
+
+    :param rows: 可迭代的行（字典）。
+    :param jsonfile: 以文本模式打开的输出文件对象。
+    :param output_format: 'json'（JSON数组）或 'ndjson'（每行一个对象）。
+    :param progress_callback: 可选，接收已写入行数的回调函数。
+    :param progress_interval: 每写入多少行调用一次回调。
+    :return: 写入的总行数。
+    """
+    count = 0
+    if output_format == 'json':
+        jsonfile.write('[')
+    for row in rows:
+        if output_format == 'json':
+            jsonfile.write('\n' if count == 0 else ',\n')
+        jsonfile.write(format_row(row, output_format))
+        count += 1
+        if progress_callback and count % progress_interval == 0:
+            progress_callback(count)
+    if output_format == 'json':
+        # 空数组与 json.dump([], indent=4) 的输出 "[]" 保持一致
+        jsonfile.write('\n]' if count else ']')
+    if progress_callback and count % progress_interval:
+        progress_callback(count)
+    return count
+
+def csv_to_json(csv_filepath, json_filepath, output_format='json',
+                buffer_size=DEFAULT_BUFFER_SIZE, progress_callback=None):
     """
     将CSV文件转换为JSON文件。
     每行数据将转换为一个JSON对象，所有对象组成一个列表。
+    转换以流式方式逐行进行，即使是数GB的CSV文件内存占用也保持平稳。
+
+    :param csv_filepath: 输入CSV文件路径。
+    :param json_filepath: 输出JSON文件路径。
+    :param output_format: 'json'（默认，缩进为4的JSON数组）、'ndjson'，
+                          或紧凑的 'columns'/'rows' 布局（带类型推断，需在内存中按列收集）。
+    :param buffer_size: 输出文件的写缓冲区大小（字节）。
+    :param progress_callback: 可选，接收已处理行数的回调函数。
     """
-    data = []
+    if output_format not in OUTPUT_FORMATS:
+        print(f"错误：不支持的输出格式 '{output_format}'")
+        sys.exit(1)
+
     try:
         # 使用utf-8-sig以正确处理带有BOM的CSV文件
-        with open(csv_filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(csv_filepath, 'r', encoding='utf-8-sig') as csvfile, \
+                open(json_filepath, 'w', encoding='utf8', buffering=buffer_size) as jsonfile:
             # 使用DictReader，将CSV的头部作为JSON对象的键
             csv_reader = csv.DictReader(csvfile)
-            for row in csv_reader:
-                data.append(row)
+            if output_format in COMPACT_FORMATS:
+                fieldnames, columns = collect_columns(csv_reader, fieldnames=csv_reader.fieldnames)
+                write_compact_json(fieldnames, columns, jsonfile, output_format)
+                count = len(columns[0]) if columns else 0
+            else:
+                count = write_json_rows(csv_reader, jsonfile, output_format, progress_callback)
+
+        print(f"成功将 '{csv_filepath}' 转换为 '{json_filepath}'（共 {count} 行）")
+
+    except FileNotFoundError:
+        print(f"错误：文件未找到 '{csv_filepath}'")
+        sys.exit(1)
+    except Exception as e:
+        print(f"处理文件时发生错误: {e}")
+        sys.exit(1)
 
-        # 将数据写入JSON文件
-        with open(json_filepath, 'w', encoding='utf8') as jsonfile:
-            # 使用indent=4使JSON文件格式化，更易读
-            json.dump(data, jsonfile, ensure_ascii=False, indent=4)
+def _find_chunk_boundaries(csv_filepath, start, end, chunk_size, limit=None):
+    """
+    在 [start, end) 范围内寻找安全的分块边界。
+    边界总是位于引号之外的换行符之后，因此不会把带换行的引号字段切开。
+    引号的奇偶性需要从 start 开始累计，所以这里顺序扫描一遍文件，
+    但只用 bytes.count/find 这类C层面的操作，速度接近磁盘读取速度。
 
-        print(f"成功将 '{csv_filepath}' 转换为 '{json_filepath}'")
+    :return: 升序的字节偏移列表，首元素为 start，末元素为 end。
+    """
+    boundaries = [start]
+    next_target = start + chunk_size
+    quotes = 0  # 当前块之前累计的引号数
+    offset = start
+    with open(csv_filepath, 'rb') as f:
+        f.seek(start)
+        while next_target < end and (limit is None or len(boundaries) <= limit):
+            block = f.read(min(SCAN_BLOCK_SIZE, end - offset))
+            if not block:
+                break
+            block_quotes = quotes
+            scanned = 0
+            pos = max(0, next_target - offset)
+            while pos < len(block):
+                nl = block.find(b'\n', pos)
+                if nl == -1:
+                    break
+                block_quotes += block.count(b'"', scanned, nl)
+                scanned = nl
+                if block_quotes % 2 == 0:
+                    boundaries.append(offset + nl + 1)
+                    if limit is not None and len(boundaries) > limit:
+                        break
+                    next_target = offset + nl + 1 + chunk_size
+                    pos = max(nl + 1, next_target - offset)
+                else:
+                    pos = nl + 1
+            quotes += block.count(b'"')
+            offset += len(block)
+    if boundaries[-1] < end:
+        boundaries.append(end)
+    return boundaries
+
+def _convert_chunk(task):
+    """
+    进程池工作函数：转换 [start, end) 字节范围内的CSV记录。
+    返回 (行数, 拼接好的JSON文本片段)，片段之间由主进程按原顺序拼接。
+    """
+    csv_filepath, start, end, fieldnames, output_format = task
+    with open(csv_filepath, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # 与单进程模式一样使用通用换行模式解码
+    text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+    rows = [format_row(row, output_format) for row in csv.DictReader(text, fieldnames=fieldnames)]
+    separator = ',\n' if output_format == 'json' else ''
+    return len(rows), separator.join(rows)
+
+def csv_to_json_parallel(csv_filepath, json_filepath, workers, output_format='json',
+                         buffer_size=DEFAULT_BUFFER_SIZE, progress_callback=None,
+                         chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    使用多进程并行将CSV文件转换为JSON文件。
+    输入按引号安全的换行边界切分为多个分块，由进程池并行转换后按原顺序拼接，
+    输出与单进程的 csv_to_json 逐字节一致。
+
+    :param workers: 工作进程数量，小于等于1时退化为单进程流式转换。
+    :param chunk_size: 每个分块的目标大小（字节）。
+    其余参数与 csv_to_json 相同。
+    """
+    # 紧凑布局需要整列推断类型，无法按分块拼接，直接走单进程
+    if workers <= 1 or output_format in COMPACT_FORMATS:
+        return csv_to_json(csv_filepath, json_filepath, output_format, buffer_size, progress_callback)
+    if output_format not in STREAM_FORMATS:
+        print(f"错误：不支持的输出格式 '{output_format}'")
+        sys.exit(1)
+
+    try:
+        file_size = os.path.getsize(csv_filepath)
+        with open(csv_filepath, 'rb') as f:
+            data_start = len(UTF8_BOM) if f.read(len(UTF8_BOM)) == UTF8_BOM else 0
+
+        # 先解析表头，表头之后才是可以切分的数据区
+        header_bounds = _find_chunk_boundaries(csv_filepath, data_start, file_size, 0, limit=1)
+        if file_size <= data_start or len(header_bounds) < 2:
+            # 空文件（或只有BOM）没有可切分的数据，交给单进程转换，输出与其完全一致
+            return csv_to_json(csv_filepath, json_filepath, output_format, buffer_size, progress_callback)
+        header_end = header_bounds[1]
+        with open(csv_filepath, 'rb') as f:
+            f.seek(data_start)
+            header = f.read(header_end - data_start)
+        fieldnames = next(csv.reader(io.TextIOWrapper(io.BytesIO(header), encoding='utf-8')), [])
+
+        # 分块数量至少为进程数，保证每个进程都有活干
+        chunk_size = max(1, min(chunk_size, (file_size - header_end) // workers))
+        boundaries = _find_chunk_boundaries(csv_filepath, header_end, file_size, chunk_size)
+        tasks = [(csv_filepath, s, e, fieldnames, output_format)
+                 for s, e in zip(boundaries, boundaries[1:])]
+
+        count = 0
+        with Pool(workers) as pool, \
+                open(json_filepath, 'w', encoding='utf8', buffering=buffer_size) as jsonfile:
+            if output_format == 'json':
+                jsonfile.write('[')
+            # imap 保证结果按提交顺序返回
+            for chunk_rows, chunk_text in pool.imap(_convert_chunk, tasks):
+                if not chunk_rows:
+                    continue
+                if output_format == 'json':
+                    jsonfile.write('\n' if count == 0 else ',\n')
+                jsonfile.write(chunk_text)
+                count += chunk_rows
+                if progress_callback:
+                    progress_callback(count)
+            if output_format == 'json':
+                jsonfile.write('\n]' if count else ']')
+
+        print(f"成功将 '{csv_filepath}' 转换为 '{json_filepath}'（共 {count} 行，{workers} 个进程）")
 
     except FileNotFoundError:
         print(f"错误：文件未找到 '{csv_filepath}'")
@@ -31,15 +333,31 @@ def csv_to_json(csv_filepath, json_filepath):
         print(f"处理文件时发生错误: {e}")
         sys.exit(1)
 
+def _print_progress(count):
+    """将进度输出到标准错误，避免干扰正常输出。"""
+    print(f"已处理 {count} 行...", file=sys.stderr)
+
 if __name__ == "__main__":
-    # 检查命令行参数
-    if len(sys.argv) != 3:
-        print("用法: python3 csv_to_json.py <输入CSV文件路径> <输出JSON文件路径>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="将CSV文件流式转换为JSON文件。")
+    parser.add_argument("input_csv", help="输入CSV文件路径")
+    parser.add_argument("output_json", help="输出JSON文件路径")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default='json',
+                        help="输出格式：json（默认）、ndjson，或带类型推断的紧凑布局 columns/rows")
+    parser.add_argument("--ndjson", action="store_true", help="等同于 --format ndjson")
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE,
+                        help=f"写缓冲区大小（字节），默认 {DEFAULT_BUFFER_SIZE}")
+    parser.add_argument("--progress", action="store_true", help="在标准错误中输出处理进度")
+    parser.add_argument("--workers", type=int, default=1, help="并行转换的进程数，默认 1（单进程流式）")
+    args = parser.parse_args()
 
-    input_csv = sys.argv[1]
-    output_json = sys.argv[2]
-    csv_to_json(input_csv, output_json)
+    csv_to_json_parallel(
+        args.input_csv,
+        args.output_json,
+        args.workers,
+        output_format='ndjson' if args.ndjson else args.format,
+        buffer_size=args.buffer_size,
+        progress_callback=_print_progress if args.progress else None,
+    )
 
     # 留下一句暖暖的话
     print("\n这是Muimill今天摘给你的小星星～希望你喜欢。")
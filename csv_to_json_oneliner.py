@@ -7,36 +7,216 @@
 # 2. 将每一行数据转换为一个字典，键为标题，值为对应列的数据。
 # 3. 将所有行组成的字典列表输出为JSON格式。
 #
+# 对于大文件，还提供了分块流式转换（csv_to_json_stream），支持三种引擎：
+# - pandas：使用 chunksize 分块读取；
+# - pyarrow：使用 pyarrow 的流式CSV读取器；
+# - csv：标准库 csv 模块，无需任何第三方依赖。
+# 输出直接写入文件或标准输出，不会在内存中拼接出完整的JSON字符串。
+# 另外支持表头只出现一次的紧凑布局（columns/rows），值会带上推断出的类型。
+#
 # 运行前请确保已安装pandas库: pip install pandas
+# （可选）使用pyarrow引擎需安装: pip install pyarrow
 #
 # 作者: Muimill
 #
 # ----------------------------------------------------------------------
 
-import pandas as pd
-import json
+import argparse
+import csv
 import sys
 
+from csv_to_json import COMPACT_FORMATS, collect_columns, write_compact_json, write_json_rows
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
+ENGINES = ('pandas', 'pyarrow', 'csv')
+LAYOUTS = ('records',) + COMPACT_FORMATS
+# 每个分块的行数（pandas/csv引擎）
+DEFAULT_CHUNKSIZE = 100000
+# pyarrow 每次读取的块大小（字节）
+PYARROW_BLOCK_SIZE = 16 * 1024 * 1024
+# pandas 推断到的 numpy 类型映射为可空类型，避免后续分块出现缺失值时报错
+_NULLABLE_DTYPES = {'int64': 'Int64', 'bool': 'boolean', 'object': 'string', 'str': 'string'}
+# 后续分块与缓存类型冲突时逐级放宽：整数 → 浮点数，其余一律放宽为字符串
+_WIDER_DTYPES = {'Int64': 'Float64'}
+# pandas 识别为布尔值的字符串
+_BOOL_STRINGS = {'true': True, 'false': False}
+
 def csv_to_json_oneliner(csv_file_path):
     """
     使用一行Pandas代码将CSV文件内容转换为JSON格式的字符串。
-    
+
     :param csv_file_path: CSV文件的路径。
     :return: 包含CSV数据的JSON格式字符串。
     """
     # 这是Muimill今天摘给你的小星星～希望你喜欢。
     return pd.read_csv(csv_file_path).to_json(orient='records', force_ascii=False, indent=4)
 
+def infer_pandas_dtypes(csv_file_path, sample_rows=DEFAULT_CHUNKSIZE):
+    """
+    读取CSV开头的样本行推断每一列的类型。
+    推断结果会固定用于之后的所有分块，同一列不会在int和字符串之间来回变化；
+    之后的分块出现与之冲突的值时只会放宽类型（见 _iter_pandas_records），不会中途报错。
+    样本中全为空的列记为None，留到第一次出现值时再确定类型。
+
+    :return: 列名到pandas类型名（或None）的字典。
+    """
+    sample = pd.read_csv(csv_file_path, nrows=sample_rows)
+    return {col: None if sample[col].isna().all() else _NULLABLE_DTYPES.get(str(dtype), str(dtype))
+            for col, dtype in sample.dtypes.items()}
+
+def _convert_column(values, dtype):
+    """将按字符串读取的一列转换为指定类型，存在无法转换的值时抛出 ValueError 或 TypeError。"""
+    if dtype == 'boolean':
+        converted = values.str.lower().map(_BOOL_STRINGS)
+        if converted.isna().sum() != values.isna().sum():
+            raise ValueError("存在不是布尔值的字符串")
+        return converted.astype('boolean')
+    return values.astype(dtype)
+
+def _to_python(value):
+    """将pandas/numpy的标量转换为可JSON序列化的Python对象，缺失值转为None。"""
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def _iter_pandas_records(csv_file_path, chunksize, dtypes):
+    """
+    使用pandas分块读取CSV，按缓存的列类型逐行产出字典。
+
+    每个分块先按字符串读取，再逐列转换为缓存的类型。某一列出现与缓存类型冲突的值时
+    （如样本中全是整数、之后出现了文本），把该列放宽为更宽的类型并写回 dtypes，
+    之后的分块都使用放宽后的类型，转换不会在输出到一半时失败。
+    """
+    for chunk in pd.read_csv(csv_file_path, chunksize=chunksize, dtype='string'):
+        for col in chunk.columns:
+            values = chunk[col]
+            dtype = dtypes.get(col)
+            if dtype is None:
+                if values.isna().all():
+                    # 仍然全为空，留到之后的分块再确定类型
+                    continue
+                dtype = 'Int64'
+            while True:
+                try:
+                    chunk[col] = _convert_column(values, dtype)
+                    break
+                except (ValueError, TypeError):
+                    dtype = _WIDER_DTYPES.get(dtype, 'string')
+            dtypes[col] = dtype
+        columns = list(chunk.columns)
+        for values in chunk.itertuples(index=False, name=None):
+            yield {col: _to_python(v) for col, v in zip(columns, values)}
+
+def _iter_pyarrow_records(csv_file_path, dtypes):
+    """
+    使用pyarrow流式读取CSV。
+    pyarrow 的流式读取器在第一个块上推断schema并在之后的块中强制使用，
+    这里把推断结果写回 dtypes，便于调用方在处理同构文件时复用。
+    被推断为日期/时间的列保持原始文本，与pandas/csv引擎的输出一致
+    （否则 to_pylist 会产出 datetime 对象，标准库JSON后端无法序列化）。
+    """
+    column_types = dict(dtypes or {})
+    read_options = pa_csv.ReadOptions(block_size=PYARROW_BLOCK_SIZE)
+
+    def open_reader():
+        convert_options = pa_csv.ConvertOptions(column_types=column_types or None)
+        return pa_csv.open_csv(csv_file_path, read_options=read_options, convert_options=convert_options)
+
+    reader = open_reader()
+    temporal = [field.name for field in reader.schema if pa.types.is_temporal(field.type)]
+    if temporal:
+        # 只有打开时才能指定列类型，按字符串类型重新打开
+        reader.close()
+        column_types.update((name, pa.string()) for name in temporal)
+        reader = open_reader()
+    if dtypes is not None:
+        dtypes.update({field.name: field.type for field in reader.schema})
+    for batch in reader:
+        yield from batch.to_pylist()
+
+def _iter_csv_records(csv_file_path):
+    """使用标准库csv逐行读取，所有值保持为字符串。"""
+    with open(csv_file_path, 'r', encoding='utf-8-sig') as csvfile:
+        yield from csv.DictReader(csvfile)
+
+def _write_output(records, f, layout, infer_types):
+    """按布局将记录写入文件对象，返回写入的行数。"""
+    if layout == 'records':
+        return write_json_rows(records, f)
+    fieldnames, columns = collect_columns(records, infer_types=infer_types)
+    write_compact_json(fieldnames, columns, f, layout)
+    return len(columns[0]) if columns else 0
+
+def csv_to_json_stream(csv_file_path, output=None, engine='pandas', chunksize=DEFAULT_CHUNKSIZE, dtypes=None,
+                       layout='records'):
+    """
+    分块读取CSV并将JSON数组流式写入文件或标准输出。
+
+    :param csv_file_path: CSV文件的路径。
+    :param output: 输出文件路径；为None时写入标准输出。
+    :param engine: 'pandas'、'pyarrow' 或 'csv'。
+    :param chunksize: 每个分块的行数（pandas引擎）。
+    :param dtypes: 可选的列类型缓存字典。为空字典时会填入本次推断的结果，
+                   传入已有结果则跳过推断，直接按缓存类型读取。
+    :param layout: 'records'（默认，对象数组）、'columns'（按列数组）或
+                   'rows'（{"columns": [...], "rows": [[...]]}）。紧凑布局需要在内存中按列收集数据，
+                   csv引擎下会同时为每一列推断类型。
+    :return: 写入的行数。
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的引擎: {engine}，可选: {', '.join(ENGINES)}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"不支持的布局: {layout}，可选: {', '.join(LAYOUTS)}")
+
+    if engine == 'pandas':
+        if pd is None:
+            raise ImportError("pandas 引擎需要安装 pandas: pip install pandas")
+        if dtypes is None:
+            dtypes = {}
+        if not dtypes:
+            dtypes.update(infer_pandas_dtypes(csv_file_path, chunksize))
+        records = _iter_pandas_records(csv_file_path, chunksize, dtypes)
+    elif engine == 'pyarrow':
+        if pa_csv is None:
+            raise ImportError("pyarrow 引擎需要安装 pyarrow: pip install pyarrow")
+        records = _iter_pyarrow_records(csv_file_path, dtypes)
+    else:
+        records = _iter_csv_records(csv_file_path)
+
+    # pandas/pyarrow 读出的值已经带类型，只有csv引擎需要推断
+    infer_types = engine == 'csv'
+    if output is None:
+        count = _write_output(records, sys.stdout, layout, infer_types)
+        sys.stdout.write('\n')
+        return count
+    with open(output, 'w', encoding='utf-8') as f:
+        return _write_output(records, f, layout, infer_types)
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("用法: python csv_to_json_oneliner.py <csv_文件路径>")
-        sys.exit(1)
-    
-    file_path = sys.argv[1]
-    
+    parser = argparse.ArgumentParser(description="将CSV文件转换为JSON格式的列表。")
+    parser.add_argument("csv_file", help="CSV文件路径")
+    parser.add_argument("-o", "--output", help="输出JSON文件路径，默认输出到标准输出")
+    parser.add_argument("--engine", choices=ENGINES, default='pandas', help="读取CSV的引擎，默认 pandas")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"每个分块的行数，默认 {DEFAULT_CHUNKSIZE}")
+    parser.add_argument("--layout", choices=LAYOUTS, default='records',
+                        help="输出布局：records（默认）、columns 或 rows")
+    args = parser.parse_args()
+
+    file_path = args.csv_file
+
     try:
-        json_output = csv_to_json_oneliner(file_path)
-        print(json_output)
+        csv_to_json_stream(file_path, args.output, args.engine, args.chunksize, layout=args.layout)
     except FileNotFoundError:
         print(f"错误: 文件未找到 - {file_path}")
         sys.exit(1)
@@ -4,32 +4,83 @@
 # 这是一个提升开发者效率的实用小工具。
 
 import argparse
+import fnmatch
 from pathlib import Path
 import os
 
-def find_files_by_extension(directory: str, extension: str):
+from file_index import DEFAULT_INDEX_PATH, FileIndex
+from file_walker import walk_files, walk_files_parallel
+
+# 默认跳过的目录
+DEFAULT_EXCLUDE_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv'}
+
+def iter_files_by_extension(directory: str, extension, exclude_dirs=None, workers=None,
+                            pattern=None, min_size=None, max_size=None):
+    """
+    在指定目录下递归查找特定扩展名的文件，以生成器方式逐个产出路径。
+
+    :param directory: 要搜索的根目录路径。
+    :param extension: 要查找的文件扩展名（例如：'.py'），多个扩展名可用逗号分隔或传入列表。
+    :param exclude_dirs: 需要跳过的目录名集合。
+    :param workers: 大于1时使用多线程并发列目录（适合NFS等高延迟文件系统），结果顺序不变。
+    :param pattern: 可选的文件名glob模式（区分大小写），例如 'test_*'。
+    :param min_size: 可选的最小文件大小（字节，含）。
+    :param max_size: 可选的最大文件大小（字节，含）。
+    """
+    if workers and workers > 1:
+        entries = walk_files_parallel(directory, extension, exclude_dirs, workers)
+    else:
+        entries = walk_files(directory, extension, exclude_dirs)
+    check_size = min_size is not None or max_size is not None
+    for entry in entries:
+        if pattern and not fnmatch.fnmatchcase(entry.name, pattern):
+            continue
+        if check_size:
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            if (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                continue
+        yield Path(entry.path)
+
+def iter_files_from_index(directory: str, extension, exclude_dirs=None, index_path=DEFAULT_INDEX_PATH,
+                          refresh=True, rebuild=False, pattern=None, min_size=None, max_size=None):
+    """
+    通过持久化的SQLite索引查找文件（见 file_index.py）。
+
+    查询前先增量刷新索引：只重新列出修改时间发生变化的目录，因此在大型代码库上
+    重复查询时，大部分时间只花在对每个目录的一次 stat 上。
+
+    :param index_path: 索引数据库文件路径。
+    :param refresh: 是否在查询前刷新索引；为False时直接使用现有索引。
+    :param rebuild: 是否丢弃旧索引完整重建；修改排除目录后无需重建，受影响的目录会被自动重新扫描。
+    其余参数同 iter_files_by_extension。
+    """
+    with FileIndex(index_path) as index:
+        if refresh or rebuild:
+            index.refresh(directory, exclude_dirs, rebuild=rebuild)
+        rows = index.query(directory, extension, pattern, min_size, max_size)
+    for path, _size, _mtime_ns in rows:
+        yield Path(path)
+
+def find_files_by_extension(directory: str, extension, exclude_dirs=None, workers=None):
     """
     在指定目录下递归查找所有特定扩展名的文件。
 
     :param directory: 要搜索的根目录路径。
-    :param extension: 要查找的文件扩展名（例如：'.py', '.md'）。
+    :param extension: 要查找的文件扩展名（例如：'.py', '.md'），多个扩展名可用逗号分隔或传入列表。
+    :param exclude_dirs: 需要跳过的目录名集合。
+    :param workers: 大于1时使用多线程并发遍历。
     :return: 匹配文件的路径列表。
     """
-    # 确保扩展名以点开头
-    if not extension.startswith('.'):
-        extension = '.' + extension
-
     try:
-        root_path = Path(directory)
-        if not root_path.is_dir():
+        if not os.path.isdir(directory):
             print(f"错误：路径 '{directory}' 不是一个有效的目录。")
             return []
 
-        # 使用rglob进行递归搜索
-        # rglob 是 glob 的递归版本，等同于使用 '**/'
-        files = list(root_path.rglob(f"*{extension}"))
-        
-        return files
+        # 使用基于os.scandir的共享遍历器进行递归搜索
+        return list(iter_files_by_extension(directory, extension, exclude_dirs, workers))
     except Exception as e:
         print(f"发生错误：{e}")
         return []
@@ -46,31 +97,91 @@ def main():
     parser.add_argument(
         "extension",
         type=str,
-        help="要查找的文件扩展名（例如：py, md, js）。"
+        help="要查找的文件扩展名（例如：py, md, js），多个扩展名用逗号分隔（例如：py,md）。"
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        help="需要跳过的目录名，可重复指定；默认跳过 .git、node_modules 等。"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="并发列目录的线程数，适合NFS等网络/慢速文件系统；默认串行遍历。"
+    )
+    parser.add_argument(
+        "--glob",
+        default=None,
+        help="按文件名的glob模式进一步筛选（区分大小写），例如 'test_*'。"
+    )
+    parser.add_argument(
+        "--min-size",
+        type=int,
+        default=None,
+        help="最小文件大小（字节）。"
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=None,
+        help="最大文件大小（字节）。"
+    )
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        const=DEFAULT_INDEX_PATH,
+        default=None,
+        help=f"使用持久化的SQLite文件索引加速重复查询，可指定索引文件路径（默认 {DEFAULT_INDEX_PATH}）。"
+    )
+    parser.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="配合 --index 使用：不刷新索引，直接查询（最快，但可能不是最新结果）。"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="配合 --index 使用：丢弃旧索引并完整重建。"
     )
     
     args = parser.parse_args()
     
     # 规范化扩展名，确保以点开头
-    ext = args.extension
-    if not ext.startswith('.'):
-        ext = '.' + ext
+    ext = ', '.join(e if e.startswith('.') else '.' + e for e in args.extension.split(',') if e)
+    exclude_dirs = set(args.exclude) if args.exclude is not None else DEFAULT_EXCLUDE_DIRS
 
     print(f"正在目录 '{args.directory}' 中递归查找所有 '{ext}' 文件...")
-    
-    found_files = find_files_by_extension(args.directory, ext)
-    
-    if found_files:
-        print(f"\n找到 {len(found_files)} 个 '{ext}' 文件：")
-        for file_path in found_files:
-            # 打印相对路径，更简洁
-            try:
-                # 尝试获取相对于当前执行目录的路径
-                relative_path = file_path.relative_to(Path.cwd())
-                print(f"- {relative_path}")
-            except ValueError:
-                # 如果无法计算相对路径，则打印完整路径
-                print(f"- {file_path}")
+
+    if not os.path.isdir(args.directory):
+        print(f"错误：路径 '{args.directory}' 不是一个有效的目录。")
+        return
+
+    # 边遍历边输出，不需要等待整棵目录树扫描完成
+    cwd = Path.cwd()
+    count = 0
+    if args.index:
+        files = iter_files_from_index(args.directory, args.extension, exclude_dirs, args.index,
+                                      not args.no_refresh, args.rebuild, args.glob, args.min_size, args.max_size)
+    else:
+        files = iter_files_by_extension(args.directory, args.extension, exclude_dirs, args.workers,
+                                        args.glob, args.min_size, args.max_size)
+    for file_path in files:
+        if count == 0:
+            print()
+        count += 1
+        # 打印相对路径，更简洁
+        try:
+            # 尝试获取相对于当前执行目录的路径
+            relative_path = file_path.relative_to(cwd)
+            print(f"- {relative_path}")
+        except ValueError:
+            # 如果无法计算相对路径，则打印完整路径
+            print(f"- {file_path}")
+
+    if count:
+        print(f"\n共找到 {count} 个 '{ext}' 文件。")
     else:
         print(f"\n未找到任何 '{ext}' 文件。")
 
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+file_index.py - 基于SQLite的持久化文件索引
+
+为 file_finder.py 提供可选的磁盘索引，记录每个文件的路径、扩展名、大小和修改时间。
+首次运行时完整扫描目录树；之后的刷新只重新列出修改时间（mtime）发生变化的目录，
+未变化的目录直接沿用索引中记录的子目录继续向下检查，只需一次 stat。
+按扩展名、glob模式或大小范围的查询直接由索引回答，通常只需几毫秒。
+
+注意：目录的mtime只在其中的文件被新增、删除或重命名时才会变化，
+文件内容被原地修改时，索引中的大小和修改时间要等到所在目录被重新扫描时才会更新。
+
+这是Muimill今天摘给你的小星星～希望你喜欢。
+"""
+
+import os
+import sqlite3
+
+from file_walker import normalize_extensions
+
+# 默认索引放在用户缓存目录中，而不是当前目录：索引文件本身不会被索引，
+# 写入索引（包括WAL的 -wal/-shm 文件）也不会改变被索引目录的mtime
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".cache", "file_index.sqlite")
+# SQLite 在数据库文件旁边创建的辅助文件
+_DB_SUFFIXES = ('', '-wal', '-shm', '-journal')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER,
+    exclude_dirs TEXT
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT,
+    name TEXT,
+    ext TEXT,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+"""
+
+def _subtree_clause(column):
+    """匹配某个目录本身及其所有子孙目录的SQL条件，参数为 (目录, 前缀长度, 目录+分隔符)。"""
+    return f"({column} = ? OR substr({column}, 1, ?) = ?)"
+
+def _subtree_params(path):
+    prefix = path.rstrip(os.sep) + os.sep
+    return path, len(prefix), prefix
+
+class FileIndex:
+    """
+    持久化文件索引。
+
+    用法示例::
+
+        with FileIndex() as index:
+            index.refresh("src", exclude_dirs={".git"})
+            rows = index.query("src", extensions=".py", min_size=1024)
+    """
+
+    def __init__(self, db_path=DEFAULT_INDEX_PATH):
+        if db_path != ':memory:':
+            db_path = os.path.abspath(db_path)
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # 索引文件放在被索引的目录中时，跳过它自己
+        self._db_files = frozenset(db_path + suffix for suffix in _DB_SUFFIXES)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        # 旧版本的索引没有 dirs.exclude_dirs 列：补上后所有目录在下次刷新时各重新扫描一次
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(dirs)")}
+        if 'exclude_dirs' not in columns:
+            self.conn.execute("ALTER TABLE dirs ADD COLUMN exclude_dirs TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _delete_tree(self, path):
+        """从索引中删除一个目录及其全部子孙目录和文件。"""
+        params = _subtree_params(path)
+        self.conn.execute(f"DELETE FROM dirs WHERE {_subtree_clause('path')}", params)
+        self.conn.execute(f"DELETE FROM files WHERE {_subtree_clause('dir')}", params)
+
+    def _rescan(self, directory, parent, mtime_ns, exclude_dirs, excluded):
+        """重新列出单个目录，更新其中的文件记录，返回需要继续检查的子目录列表。"""
+        files = []
+        subdirs = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in exclude_dirs:
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        if entry.path in self._db_files:
+                            continue
+                        st = entry.stat()
+                        files.append((entry.path, directory, entry.name,
+                                      os.path.splitext(entry.name)[1], st.st_size, st.st_mtime_ns))
+                except OSError:
+                    continue
+
+        # 已经不存在（或被排除）的子目录，连同整棵子树一起从索引中删除
+        old_subdirs = {row[0] for row in self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (directory,))}
+        for path in old_subdirs.difference(subdirs):
+            self._delete_tree(path)
+
+        self.conn.execute("DELETE FROM files WHERE dir = ?", (directory,))
+        self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", files)
+        self.conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)", (directory, parent, mtime_ns, excluded))
+        return subdirs
+
+    def refresh(self, root, exclude_dirs=None, rebuild=False):
+        """
+        增量刷新某个根目录的索引。
+
+        :param root: 要索引的根目录。
+        :param exclude_dirs: 需要跳过的目录名集合。
+        :param rebuild: 为True时丢弃该根目录的旧索引并完整重建。
+                        每个目录都记录了扫描它时使用的排除目录，排除目录不同的目录会被自动重新扫描，
+                        包括与另一个根目录重叠、以不同排除目录索引过的子树。
+        :return: (重新扫描的目录数, 未变化而跳过的目录数)
+        """
+        root = os.path.abspath(root)
+        exclude_dirs = frozenset(exclude_dirs or ())
+        scanned = skipped = 0
+        excluded = '\n'.join(sorted(exclude_dirs))
+        with self.conn:
+            if rebuild:
+                self._delete_tree(root)
+            # 根目录也记录真实的父目录：它可能是另一个已索引根目录的子目录，
+            # 父目录未变化时要靠 parent 列找到它
+            parent = os.path.dirname(root)
+            parent = parent if parent != root else None
+            self.conn.execute("UPDATE dirs SET parent = ? WHERE path = ?", (parent, root))
+            stack = [(root, parent)]
+            while stack:
+                directory, parent = stack.pop()
+                try:
+                    # 在列目录之前取mtime，列目录期间发生的变化会在下次刷新时被发现
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    self._delete_tree(directory)
+                    continue
+
+                row = self.conn.execute("SELECT mtime_ns, exclude_dirs FROM dirs WHERE path = ?",
+                                        (directory,)).fetchone()
+                if row is not None and row[0] == mtime_ns and row[1] == excluded:
+                    skipped += 1
+                    subdirs = [path for (path,) in
+                               self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (directory,))]
+                else:
+                    scanned += 1
+                    try:
+                        subdirs = self._rescan(directory, parent, mtime_ns, exclude_dirs, excluded)
+                    except OSError:
+                        self._delete_tree(directory)
+                        continue
+                stack.extend((path, directory) for path in subdirs)
+        return scanned, skipped
+
+    def query(self, root, extensions=None, pattern=None, min_size=None, max_size=None):
+        """
+        从索引中查询文件。
+
+        :param root: 只返回该目录下的文件。
+        :param extensions: 扩展名，如 '.py'、'py,md' 或 ['.py', '.md']；None表示不限。
+        :param pattern: 文件名的glob模式（如 'test_*.py'），None表示不限。
+        :param min_size: 最小文件大小（字节，含）。
+        :param max_size: 最大文件大小（字节，含）。
+        :return: (路径, 大小, 修改时间ns) 的列表，按路径排序。
+        """
+        conditions = [_subtree_clause('dir')]
+        params = list(_subtree_params(os.path.abspath(root)))
+        extensions = normalize_extensions(extensions)
+        if extensions:
+            # 单段扩展名走ext列上的索引；'.tar.gz' 这类多段扩展名按文件名后缀比较
+            ext_conditions = []
+            for ext in extensions:
+                if ext.count('.') == 1 and ext.startswith('.'):
+                    ext_conditions.append("ext = ?")
+                    params.append(ext)
+                else:
+                    ext_conditions.append("substr(name, -?) = ?")
+                    params.extend((len(ext), ext))
+            conditions.append("(" + " OR ".join(ext_conditions) + ")")
+        if pattern:
+            conditions.append("name GLOB ?")
+            params.append(pattern)
+        if min_size is not None:
+            conditions.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            conditions.append("size <= ?")
+            params.append(max_size)
+        sql = f"SELECT path, size, mtime_ns FROM files WHERE {' AND '.join(conditions)} ORDER BY path"
+        return self.conn.execute(sql, params).fetchall()
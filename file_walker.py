@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+file_walker.py - 基于 os.scandir 的快速文件遍历器
+
+find_files_by_ext.py 和 file_finder.py 共用的遍历实现：
+- 直接复用 os.DirEntry 缓存的类型信息，普通文件不需要额外的 stat 调用；
+- 一次遍历同时匹配多个扩展名；
+- 在下降之前剪掉需要排除的目录（如 .git、node_modules）；
+- 以生成器方式流式产出结果，不需要先把完整列表放进内存。
+
+对于NFS、overlay等每次列目录延迟很高的文件系统，walk_parallel / walk_files_parallel
+使用线程池并发列出接下来将要访问的若干个目录；调用方仍按与串行遍历完全相同的顺序得到结果，
+并且可以像 os.walk 一样通过修改子目录名列表剪枝。
+
+这是Muimill今天摘给你的小星星～希望你喜欢。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 并行遍历的默认线程数，目录列举主要耗在I/O等待上，可以明显多于CPU核数
+DEFAULT_WORKERS = 16
+
+def normalize_extensions(extensions):
+    """
+    将扩展名统一为以点开头的元组，支持字符串（可用逗号分隔多个）或可迭代对象。
+    传入None或空值时返回None，表示匹配所有文件。
+    """
+    if not extensions:
+        return None
+    if isinstance(extensions, str):
+        extensions = extensions.split(',')
+    normalized = tuple(ext if ext.startswith('.') else '.' + ext
+                       for ext in (e.strip() for e in extensions) if ext)
+    return normalized or None
+
+def walk_files(root, extensions=None, exclude_dirs=None, follow_symlinks=False):
+    """
+    递归遍历目录，逐个产出匹配扩展名的文件（os.DirEntry）。
+
+    遍历顺序为深度优先的前序遍历：先产出当前目录中的文件，再按 scandir 返回的顺序
+    依次进入子目录。调用方可以通过 entry.path 获取路径，通过 entry.stat() 获取
+    大小和修改时间（结果会被缓存）。
+
+    :param root: 要遍历的根目录。
+    :param extensions: 扩展名，如 '.py'、'py,md' 或 ['.py', '.md']；为None时匹配所有文件。
+    :param exclude_dirs: 需要跳过的目录名集合。
+    :param follow_symlinks: 是否进入指向目录的符号链接。
+    """
+    extensions = normalize_extensions(extensions)
+    exclude_dirs = frozenset(exclude_dirs or ())
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            if entry.name not in exclude_dirs:
+                                subdirs.append(entry.path)
+                        elif (extensions is None or entry.name.endswith(extensions)) and entry.is_file():
+                            yield entry
+                    except OSError:
+                        # 遍历过程中文件被删除或无权限访问，跳过即可
+                        continue
+        except OSError:
+            continue
+        # 逆序入栈，保证子目录按 scandir 的顺序被访问
+        stack.extend(reversed(subdirs))
+
+def _list_directory(directory, exclude_dirs, follow_symlinks):
+    """
+    列出单个目录，返回 (子目录名列表, 需要进入的子目录路径列表, 非目录项DirEntry列表)。
+    与 os.walk 一致：指向目录的符号链接计入子目录名，但默认不进入。
+    """
+    dirnames = []
+    subdirs = []
+    nondirs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    nondirs.append(entry)
+                elif entry.name not in exclude_dirs:
+                    dirnames.append(entry.name)
+                    try:
+                        if follow_symlinks or not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    except OSError:
+                        continue
+    except OSError:
+        pass
+    return dirnames, subdirs, nondirs
+
+def walk_parallel(root, exclude_dirs=None, workers=DEFAULT_WORKERS, follow_symlinks=False):
+    """
+    多线程版本的自顶向下 os.walk，产出 (目录路径, 子目录名列表, 非目录项DirEntry列表)。
+
+    目录由线程池并发列出，结果的顺序与 os.walk(root) 加上排除目录剪枝后的顺序完全一致。
+    与 os.walk 的自顶向下模式相同，调用方可以原地修改子目录名列表来跳过或调整这些目录。
+    一个目录的子目录要等调用方处理完该目录之后才会提交，被剪掉的子树一个目录也不会列出；
+    预先列出的只有接下来按顺序将要产出的 2*workers 个目录，调用方再慢也不会无限制地积压结果。
+    调用方提前停止迭代时，尚未开始的列目录任务会被取消。
+
+    :param root: 要遍历的根目录。
+    :param exclude_dirs: 需要跳过的目录名集合（不会出现在子目录名列表中）。
+    :param workers: 并发列目录的线程数上限。
+    :param follow_symlinks: 是否进入指向目录的符号链接。
+    """
+    exclude_dirs = frozenset(exclude_dirs or ())
+    window = 2 * max(1, workers)
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        # 栈顶是下一个要产出的目录，元素为 [目录路径, Future]，尚未提交时Future为None
+        stack = [[root, None]]
+        while stack:
+            # 只为接下来将要产出的 window 个目录提交列目录任务
+            for item in stack[:-window - 1:-1]:
+                if item[1] is None:
+                    item[1] = executor.submit(_list_directory, item[0], exclude_dirs, follow_symlinks)
+            directory, future = stack.pop()
+            dirnames, subdirs, nondirs = future.result()
+            yield directory, dirnames, nondirs
+            # 与 os.walk 一致：按调用方修改后的子目录名列表进入，被删除的目录不再进入
+            paths = {os.path.basename(path): path for path in subdirs}
+            stack.extend([paths[name], None] for name in reversed(dirnames) if name in paths)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def walk_files_parallel(root, extensions=None, exclude_dirs=None, workers=DEFAULT_WORKERS, follow_symlinks=False):
+    """
+    walk_files 的多线程版本，参数和产出顺序都与 walk_files 相同。
+    """
+    extensions = normalize_extensions(extensions)
+    for _, _, entries in walk_parallel(root, exclude_dirs, workers, follow_symlinks):
+        for entry in entries:
+            try:
+                if (extensions is None or entry.name.endswith(extensions)) and entry.is_file():
+                    yield entry
+            except OSError:
+                continue
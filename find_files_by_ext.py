@@ -1,22 +1,28 @@
 # -*- coding: utf-8 -*-
 """
 # 文件查找小工具
-# 使用Python标准库pathlib，递归查找指定目录下所有特定扩展名的文件。
+# 使用基于os.scandir的共享遍历器（file_walker），递归查找指定目录下所有特定扩展名的文件。
 # 实用场景：快速统计项目中的特定文件数量，或批量处理某一类型的文件。
 """
 import sys
 from pathlib import Path
 
-def find_files_by_ext(directory: str, extension: str):
+from file_walker import normalize_extensions, walk_files
+
+def find_files_by_ext(directory: str, extension: str, exclude_dirs=None):
     """
     递归查找指定目录下所有特定扩展名的文件。
 
     :param directory: 要搜索的目录路径（字符串）。
-    :param extension: 要查找的文件扩展名，例如 '.py' 或 '.md'。
+    :param extension: 要查找的文件扩展名，例如 '.py' 或 '.md'，多个扩展名用逗号分隔（'py,md'）。
+    :param exclude_dirs: 可选，需要跳过的目录名集合。
     """
     # 确保扩展名以点开头
-    if not extension.startswith('.'):
-        extension = '.' + extension
+    extensions = normalize_extensions(extension)
+    if not extensions:
+        print("错误：请至少指定一个文件扩展名。")
+        return
+    extension = ', '.join(extensions)
 
     # 检查目录是否存在
     base_path = Path(directory)
@@ -26,13 +32,11 @@ def find_files_by_ext(directory: str, extension: str):
 
     print(f"正在目录 '{directory}' 中递归查找扩展名为 '{extension}' 的文件...")
     
-    # 使用Path.rglob进行递归查找，非常简洁高效
-    # glob模式为 '**/*' + extension
+    # 使用os.scandir遍历，复用DirEntry的类型信息，无需对每个匹配项再做一次stat
     count = 0
-    for file_path in base_path.rglob(f'*{extension}'):
-        if file_path.is_file():
-            print(file_path)
-            count += 1
+    for entry in walk_files(directory, extensions, exclude_dirs):
+        print(entry.path)
+        count += 1
             
     print(f"\n--- 查找完成 ---")
     print(f"共找到 {count} 个 {extension} 文件。")
@@ -40,14 +44,15 @@ def find_files_by_ext(directory: str, extension: str):
 if __name__ == "__main__":
     # 命令行参数检查
     if len(sys.argv) < 3:
-        print("用法: python find_files_by_ext.py <目录路径> <文件扩展名>")
-        print("示例: python find_files_by_ext.py . py")
+        print("用法: python find_files_by_ext.py <目录路径> <文件扩展名[,扩展名...]> [排除目录...]")
+        print("示例: python find_files_by_ext.py . py,md .git node_modules")
         sys.exit(1)
 
     # 获取参数
     target_dir = sys.argv[1]
     target_ext = sys.argv[2]
+    excluded = set(sys.argv[3:])
     
-    find_files_by_ext(target_dir, target_ext)
+    find_files_by_ext(target_dir, target_ext, excluded)
 
 # 这是Muimill今天摘给你的小星星～希望你喜欢。
@@ -1,42 +1,345 @@
 # -*- coding: utf-8 -*-
+import argparse
+import glob
+import hashlib
 import json
+import os
+import re
+import shutil
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import json_backend
+
+# 流式格式化时每次读取的字符数
+READ_CHUNK_SIZE = 1024 * 1024
+# 单个JSON记号：结构字符、字符串、或数字/字面量
+_TOKEN_RE = re.compile(
+    r'[ \t\n\r]*(?:'
+    r'(?P<punct>[{}\[\]:,])'
+    r'|(?P<string>"(?:[^"\\]|\\.)*")'
+    r'|(?P<scalar>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null|NaN|-?Infinity)'
+    r')',
+    re.DOTALL,
+)
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+# 可能紧跟在数字/字面量之后、说明记号尚未读完整的字符
+_SCALAR_TAIL_RE = re.compile(r'[0-9a-zA-Z.+\-]*')
+_CLOSING = {'{': '}', '[': ']'}
+# 批量模式下记录“已是规范格式”文件内容哈希的缓存文件，放在用户缓存目录中而不是当前目录
+DEFAULT_HASH_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "format_json_cache.json")
 
 def format_json_to_file(json_string: str, output_filename: str = "formatted_output.json"):
     """
     将JSON字符串解析并以美观、缩进的格式写入指定文件。
-    
+
     这个小工具的灵感来源于Hacker News上关于“最高质量代码库”的讨论，
     其中强调了代码的可读性和维护性。一个格式良好的JSON文件是提高
     数据可读性的第一步。
-    
+
     :param json_string: 待格式化的JSON字符串。
     :param output_filename: 格式化后的JSON将写入的文件名。
     """
     try:
         # 解析JSON字符串
-        data = json.loads(json_string)
-        
+        data = json_backend.loads(json_string)
+
         # 以缩进4个空格的格式写入文件
         with open(output_filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-            
+            json_backend.dump(data, f, indent=4)
+
         print(f"✅ JSON数据已成功格式化并保存到文件: {output_filename}")
-        
+
     except json.JSONDecodeError as e:
         print(f"❌ 错误：无法解析JSON字符串。请检查输入格式。错误信息: {e}")
     except Exception as e:
         print(f"❌ 发生未知错误: {e}")
 
+def _canonical_scalar(kind, token):
+    """将字符串/数字/字面量记号规范化为与 json.dump(ensure_ascii=False) 相同的写法。"""
+    if kind == 'string':
+        # 没有转义序列的字符串原样输出即可，省去一次解码和编码
+        if '\\' not in token:
+            return token
+        return json.dumps(json.loads(token), ensure_ascii=False)
+    if token in ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity'):
+        return token
+    if '.' in token or 'e' in token or 'E' in token:
+        return json.dumps(float(token))
+    return str(int(token))
+
+def iter_json_tokens(infile, chunk_size=READ_CHUNK_SIZE):
+    """
+    从文件对象中增量读取并切分JSON记号，产出 (类型, 文本) 二元组。
+    类型为 'punct'、'string' 或 'scalar'。缓冲区只保留尚未处理的部分，
+    内存占用与文件大小无关（只取决于最长的单个记号）。
+    """
+    buf = ''
+    pos = 0
+    consumed = 0  # 已丢弃的字符数，用于报告错误位置
+    eof = False
+    while True:
+        match = _TOKEN_RE.match(buf, pos)
+        # 缓冲区耗尽，或记号可能被读取边界截断（数字、字面量或未闭合的字符串），读入更多数据再试
+        truncated = match is None or (match.lastgroup == 'scalar'
+                                      and _SCALAR_TAIL_RE.match(buf, match.end()).end() == len(buf))
+        if not eof and truncated:
+            chunk = infile.read(chunk_size)
+            if chunk:
+                consumed += pos
+                buf = buf[pos:] + chunk
+                pos = 0
+            else:
+                eof = True
+            continue
+        if match is None:
+            pos = _WHITESPACE_RE.match(buf, pos).end()
+            if pos == len(buf):
+                return
+            raise ValueError(f"无效的JSON内容，位置: 第 {consumed + pos} 个字符")
+        pos = match.end()
+        yield match.lastgroup, match.group(match.lastgroup)
+
+def format_json_stream(infile, outfile, indent=4, chunk_size=READ_CHUNK_SIZE):
+    """
+    流式地重新缩进JSON，不构建完整的对象树。
+    输出与 json.dump(data, indent=indent, ensure_ascii=False) 一致，
+    因此可以处理远大于内存的文件。
+
+    :param infile: 以文本模式打开的输入文件对象（例如 sys.stdin）。
+    :param outfile: 以文本模式打开的输出文件对象。
+    :param indent: 缩进空格数。
+    """
+    unit = ' ' * indent
+    stack = []
+    pending_open = False  # 刚写出 '{' 或 '['，尚不确定容器是否为空
+    expect_value = True  # 下一个记号应为值（或对象的键），而不是分隔符
+    expect_key = False  # 下一个记号应为对象的键
+    after_key = False  # 刚读到对象的键，下一个记号必须是 ':'
+    done = False  # 顶层值已经结束
+    write = outfile.write
+    for kind, token in iter_json_tokens(infile, chunk_size):
+        if done:
+            raise ValueError("JSON文档中存在多余的内容")
+        if kind == 'punct' and token in '}]':
+            if after_key or not stack or _CLOSING[stack.pop()] != token:
+                raise ValueError(f"括号不匹配: 意外的 '{token}'")
+            if pending_open:
+                pending_open = False
+            elif expect_value:
+                raise ValueError(f"'{token}' 之前缺少值")
+            else:
+                write('\n' + unit * len(stack))
+            write(token)
+            expect_value = False
+            done = not stack
+            continue
+        if kind == 'punct' and token in ',:':
+            if expect_value or after_key != (token == ':'):
+                raise ValueError(f"意外的分隔符 '{token}'")
+            write(',\n' + unit * len(stack) if token == ',' else ': ')
+            expect_value = True
+            expect_key = token == ',' and stack[-1] == '{'
+            after_key = False
+            continue
+        if not expect_value or after_key:
+            raise ValueError(f"缺少分隔符，意外的记号: {token[:20]}")
+        if expect_key and kind != 'string':
+            raise ValueError(f"对象的键必须是字符串: {token[:20]}")
+        if pending_open:
+            write('\n' + unit * len(stack))
+            pending_open = False
+        if token in _CLOSING:
+            stack.append(token)
+            write(token)
+            pending_open = True
+            expect_key = token == '{'
+        else:
+            write(_canonical_scalar(kind, token))
+            expect_value = False
+            after_key = expect_key
+            expect_key = False
+            done = not stack
+    if stack or expect_value:
+        raise ValueError("JSON内容不完整")
+
+def format_json_file(input_path: str, output_filename: str = "formatted_output.json"):
+    """
+    以流式方式格式化JSON文件（'-' 表示标准输入/标准输出），适合多GB的数据。
+
+    :param input_path: 输入JSON文件路径，'-' 表示从标准输入读取。
+    :param output_filename: 输出文件路径，'-' 表示写到标准输出。
+    """
+    try:
+        infile = sys.stdin if input_path == '-' else open(input_path, 'r', encoding='utf-8')
+        try:
+            if output_filename == '-':
+                format_json_stream(infile, sys.stdout)
+                sys.stdout.write('\n')
+                return
+            with open(output_filename, 'w', encoding='utf-8', buffering=READ_CHUNK_SIZE) as f:
+                format_json_stream(infile, f)
+        finally:
+            if infile is not sys.stdin:
+                infile.close()
+
+        print(f"✅ JSON数据已成功格式化并保存到文件: {output_filename}")
+
+    except FileNotFoundError:
+        print(f"❌ 错误：文件未找到: {input_path}")
+    except ValueError as e:
+        print(f"❌ 错误：无法解析JSON内容。请检查输入格式。错误信息: {e}")
+    except Exception as e:
+        print(f"❌ 发生未知错误: {e}")
+
+# 工作进程中的 {文件绝对路径: 规范内容的哈希}，由 _init_batch_worker 在进程启动时设置
+_known_hashes = {}
+
+def _init_batch_worker(known_hashes):
+    """进程池初始化函数：每个工作进程只接收一次哈希缓存。"""
+    global _known_hashes
+    _known_hashes = known_hashes
+
+def _load_hash_cache(cache_path):
+    """
+    读取哈希缓存：{批量目标: {文件绝对路径: 规范内容的哈希}}。
+    同一个缓存文件可以保存多个目录（或glob模式）的记录，互不冲突。
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return {target: hashes for target, hashes in cache.items() if isinstance(hashes, dict)}
+
+def _save_hash_cache(cache_path, cache):
+    """写入哈希缓存，先写临时文件再替换，避免中断时留下损坏的缓存。"""
+    tmp_path = cache_path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ 无法写入哈希缓存 {cache_path}: {e}")
+
+def _format_one(path):
+    """
+    进程池工作函数：原地格式化单个文件。
+    返回 (路径, 状态, 字节数, 规范内容的哈希, 错误信息)，
+    状态为 'cached'、'unchanged'、'formatted' 或 'error'。
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        # 内容哈希与该文件上次的规范内容一致，说明文件已是规范格式，无需解析
+        if _known_hashes.get(os.path.abspath(path)) == digest:
+            return path, 'cached', len(raw), digest, None
+        canonical = json_backend.dumps(json_backend.loads(raw), indent=4).encode('utf-8')
+        if canonical == raw:
+            return path, 'unchanged', len(raw), digest, None
+        # 先写入同目录下的临时文件再替换，保证原文件不会被写坏
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False, suffix='.tmp') as tmp:
+            tmp.write(canonical)
+        try:
+            shutil.copymode(path, tmp.name)
+            os.replace(tmp.name, path)
+        except BaseException:
+            # 替换失败时删除临时文件，不在用户目录中留下 .tmp 垃圾
+            os.unlink(tmp.name)
+            raise
+        return path, 'formatted', len(raw), hashlib.sha256(canonical).hexdigest(), None
+    except Exception as e:
+        return path, 'error', 0, None, str(e)
+
+def _collect_json_files(target):
+    """目录则递归查找其中所有 .json 文件，否则按glob模式匹配。"""
+    if os.path.isdir(target):
+        pattern = os.path.join(target, '**', '*.json')
+    else:
+        pattern = target
+    return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+def format_json_batch(target: str, workers: int = None, hash_cache: str = DEFAULT_HASH_CACHE):
+    """
+    使用进程池批量原地格式化目录（或glob匹配）下的JSON文件。
+    已是规范格式的文件会记录其内容哈希，之后的运行直接跳过，不再解析。
+
+    :param target: 目录路径或glob模式（例如 'fixtures/**/*.json'）。
+    :param workers: 工作进程数，默认为CPU核数。
+    :param hash_cache: 哈希缓存文件路径，传入None则不使用缓存。
+                       每次运行后该目标的记录只保留本次匹配到的文件，已删除文件的记录不会一直累积。
+    :return: 各状态的文件数量统计字典。
+    """
+    files = _collect_json_files(target)
+    if hash_cache:
+        # 缓存文件本身（及其临时文件）位于目标目录中时不格式化它
+        cache_files = {os.path.abspath(hash_cache), os.path.abspath(hash_cache) + '.tmp'}
+        files = [p for p in files if os.path.abspath(p) not in cache_files]
+    if not files:
+        print(f"❌ 未找到任何JSON文件: {target}")
+        return {}
+
+    all_caches = _load_hash_cache(hash_cache)
+    cache_key = os.path.abspath(target) if os.path.isdir(target) else target
+    known_hashes = all_caches.get(cache_key, {})
+    new_hashes = {}
+
+    stats = {'cached': 0, 'unchanged': 0, 'formatted': 0, 'error': 0}
+    total_bytes = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(known_hashes,)) as executor:
+        for path, status, size, digest, error in executor.map(_format_one, files, chunksize=64):
+            stats[status] += 1
+            total_bytes += size
+            if digest:
+                new_hashes[os.path.abspath(path)] = digest
+            if status == 'error':
+                print(f"❌ {path}: {error}")
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    if hash_cache:
+        all_caches[cache_key] = new_hashes
+        _save_hash_cache(hash_cache, all_caches)
+
+    print(f"✅ 共处理 {len(files)} 个文件：格式化 {stats['formatted']}，"
+          f"已规范 {stats['unchanged']}，缓存跳过 {stats['cached']}，失败 {stats['error']}")
+    print(f"⏱️ 耗时 {elapsed:.2f}s，{len(files) / elapsed:.1f} files/s，"
+          f"{total_bytes / elapsed / (1024 * 1024):.2f} MB/s")
+    return stats
+
 if __name__ == "__main__":
     # 示例用法
     example_json = '{"name": "Muimill", "project": "Code-Repository", "data": [{"id": 1, "status": "done"}, {"id": 2, "status": "pending"}], "note": "这是Muimill今天摘给你的小星星～希望你喜欢。"}'
-    
-    # 假设从命令行参数获取JSON字符串（更实用的场景）
-    if len(sys.argv) > 1:
-        input_json = sys.argv[1]
-        output_file = sys.argv[2] if len(sys.argv) > 2 else "formatted_cli_output.json"
-        format_json_to_file(input_json, output_file)
+
+    parser = argparse.ArgumentParser(description="格式化JSON字符串或（流式地）格式化JSON文件。")
+    parser.add_argument("json_string", nargs='?', help="待格式化的JSON字符串")
+    parser.add_argument("output", nargs='?', help="输出文件路径，'-' 表示标准输出")
+    parser.add_argument("-i", "--input", help="以流式方式格式化的输入JSON文件，'-' 表示标准输入")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB", help="批量原地格式化目录或glob匹配的所有JSON文件")
+    parser.add_argument("--workers", type=int, default=None, help="批量模式的进程数，默认为CPU核数")
+    parser.add_argument("--no-cache", action="store_true", help="批量模式下不读写哈希缓存")
+    args = parser.parse_args()
+
+    if args.batch:
+        format_json_batch(args.batch, args.workers, None if args.no_cache else DEFAULT_HASH_CACHE)
+    elif args.input:
+        # 对于文件输入，位置参数即为输出路径
+        output_file = args.output or args.json_string or "formatted_cli_output.json"
+        format_json_file(args.input, output_file)
+    elif args.json_string:
+        # 假设从命令行参数获取JSON字符串（更实用的场景）
+        output_file = args.output or "formatted_cli_output.json"
+        format_json_to_file(args.json_string, output_file)
     else:
         # 使用内置示例进行演示
         print("使用内置示例JSON进行演示...")
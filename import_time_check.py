@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+import_time_check.py - 基于 `python -X importtime` 的冷启动回归检查
+
+在全新的子进程中导入指定模块，解析 -X importtime 输出的累计耗时，
+超过预算时以非零状态码退出，可直接作为CI中的冷启动门禁。
+同时检查导入过程中不应被加载的重量级模块（例如验证成功路径上的 rich）。
+
+用法示例:
+    python import_time_check.py
+    python import_time_check.py config_validator --budget-ms 150 --forbid rich
+
+这是Muimill今天摘给你的小星星～希望你喜欢。
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# 默认检查的模块及其冷启动预算（毫秒）和禁止在导入时加载的模块
+DEFAULT_CHECKS = {
+    "config_validator": (300, ["rich"]),
+    "pydantic_config_validator": (300, ["rich"]),
+}
+# 重复测量次数，取中位数以减少抖动
+DEFAULT_RUNS = 5
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$')
+
+def measure_import(module: str, cwd: str = None):
+    """
+    在全新的解释器中导入模块，返回 (累计耗时毫秒, 被加载的模块名集合)。
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=cwd,
+    )
+    if result.returncode != 0:
+        # 只保留回溯信息，去掉 importtime 的逐行输出
+        error = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"导入 {module} 失败:\n" + "\n".join(error))
+
+    cumulative_us = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        loaded.add(name)
+        # 缩进最少（一个空格）的行是顶层导入，目标模块的累计时间包含其全部依赖
+        if name == module and len(match.group(3)) == 1:
+            cumulative_us = int(match.group(2))
+    if cumulative_us is None:
+        raise RuntimeError(f"未能从 -X importtime 输出中找到 {module}")
+    return cumulative_us / 1000, loaded
+
+def check_module(module: str, budget_ms: float, forbidden=(), runs: int = DEFAULT_RUNS, cwd: str = None) -> bool:
+    """测量模块的冷启动导入耗时并与预算比较，返回是否通过。"""
+    timings = []
+    loaded = set()
+    for _ in range(runs):
+        elapsed_ms, loaded = measure_import(module, cwd)
+        timings.append(elapsed_ms)
+    median_ms = statistics.median(timings)
+
+    ok = median_ms <= budget_ms
+    status = "✅" if ok else "❌"
+    print(f"{status} {module}: 导入耗时中位数 {median_ms:.1f}ms（预算 {budget_ms:.0f}ms，共 {runs} 次）")
+
+    for name in forbidden:
+        hits = sorted(m for m in loaded if m == name or m.startswith(name + "."))
+        if hits:
+            ok = False
+            print(f"❌ {module}: 导入时不应加载 {name}，但加载了: {', '.join(hits[:5])}")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="使用 -X importtime 检查模块的冷启动导入耗时。")
+    parser.add_argument("modules", nargs="*", help="要检查的模块，默认检查配置验证相关模块")
+    parser.add_argument("--budget-ms", type=float, default=None, help="导入耗时预算（毫秒）")
+    parser.add_argument("--forbid", action="append", default=None, help="导入时不允许加载的模块，可重复指定")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"测量次数，默认 {DEFAULT_RUNS}")
+    args = parser.parse_args()
+
+    if args.modules:
+        checks = {m: (args.budget_ms or 300, args.forbid or []) for m in args.modules}
+    else:
+        checks = {m: (args.budget_ms or budget, args.forbid if args.forbid is not None else forbid)
+                  for m, (budget, forbid) in DEFAULT_CHECKS.items()}
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    all_ok = True
+    for module, (budget, forbid) in checks.items():
+        try:
+            all_ok &= check_module(module, budget, forbid, args.runs, cwd=here)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            all_ok = False
+    sys.exit(0 if all_ok else 1)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+json_backend.py - 可插拔的快速JSON序列化后端
+
+安装了 orjson 时使用 orjson（通常比标准库快5~10倍），否则回退到标准库 json。
+对外提供与 json 模块相同风格的 dumps/dump/loads/load，
+并保证 ensure_ascii=False 与 indent 的输出和标准库逐字节一致。
+
+orjson 无法保证一致的情况会自动回退到标准库：含浮点数的对象
+（orjson 把 1e-07 写作 1e-7、把 NaN/Infinity 写作 null）、超过64位的整数、
+ensure_ascii=True、自定义分隔符等。
+
+这是Muimill今天摘给你的小星星～希望你喜欢。
+"""
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 当前使用的后端名称，便于调试和日志
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# 标准库在设置indent时的默认分隔符
+_INDENT_SEPARATORS = (None, (',', ': '))
+# orjson 只支持2空格缩进，4空格时将每行的前导空格加倍
+_LEADING_SPACES_RE = re.compile(rb'\n( +)')
+# orjson 输出的有限浮点数一定含有 "数字." 或 "数字e"，NaN/Infinity 值被写为 null、作为键时写为 "NaN" 等；
+# 输出中都没有这些片段时对象里不可能有浮点数（片段出现在字符串里只会多做一次检查，不会出错）
+_FLOAT_TOKEN_RE = re.compile(rb'[0-9][.eE]')
+_NON_FINITE_TOKENS = (b'null', b'NaN', b'Infinity')
+_SCALAR_TYPES = frozenset((str, int, bool, type(None)))
+
+def _double_indent(match):
+    return b'\n' + match.group(1) * 2
+
+def _contains_float(obj):
+    """对象（包括嵌套的容器和非字符串键）中是否含有浮点数。"""
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        kind = type(item)
+        # 绝大多数元素是精确的内置标量类型，先按类型判断，避免对每个元素做多次 isinstance
+        if kind in _SCALAR_TYPES:
+            continue
+        if kind is float:
+            return True
+        if isinstance(item, dict):
+            stack.extend(item.values())
+            stack.extend(key for key in item if not isinstance(key, str))
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, float):
+            return True
+    return False
+
+def _orjson_dumps(obj, indent, ensure_ascii, separators, sort_keys):
+    """尝试使用orjson序列化，无法保证与标准库输出一致时返回None。"""
+    if orjson is None or ensure_ascii:
+        return None
+    if indent is None:
+        # orjson 的紧凑输出等同于 separators=(',', ':')
+        if separators != (',', ':'):
+            return None
+    elif indent not in (2, 4) or separators not in _INDENT_SEPARATORS:
+        return None
+
+    # 标准库不认识（或按基类处理）的类型不让 orjson 自行序列化：dict/list/str/int 的子类、
+    # datetime、dataclass 都交给 default，没有 default 时抛出 TypeError 走标准库，保证报错和输出与标准库一致
+    option = orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if indent is not None:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        # 标准库按原始键排序（10 排在 2 之后），orjson 按转换后的字符串排序；
+        # 排序时不开启 OPT_NON_STR_KEYS，含非字符串键的对象抛出 TypeError 交给标准库
+        option |= orjson.OPT_SORT_KEYS
+    else:
+        option |= orjson.OPT_NON_STR_KEYS
+    try:
+        out = orjson.dumps(obj, option=option)
+    except TypeError:
+        # 超出64位的整数、UUID/numpy 等标准库不支持的类型，交给标准库处理（或报出与标准库相同的错误）
+        return None
+    maybe_float = any(token in out for token in _NON_FINITE_TOKENS) or _FLOAT_TOKEN_RE.search(out)
+    if maybe_float and _contains_float(obj):
+        # orjson 的浮点数格式与标准库不同，NaN/Infinity 还会变成 null，交给标准库保证数值不丢失
+        return None
+    if indent == 4:
+        out = _LEADING_SPACES_RE.sub(_double_indent, out)
+    return out.decode('utf-8')
+
+def dumps(obj, indent=None, ensure_ascii=False, separators=None, sort_keys=False) -> str:
+    """
+    将对象序列化为JSON字符串，参数含义与 json.dumps 相同。
+    注意 ensure_ascii 默认为 False，这是本仓库所有脚本的统一用法。
+    """
+    text = _orjson_dumps(obj, indent, ensure_ascii, separators, sort_keys)
+    if text is not None:
+        return text
+    return json.dumps(obj, indent=indent, ensure_ascii=ensure_ascii, separators=separators, sort_keys=sort_keys)
+
+def dump(obj, fp, indent=None, ensure_ascii=False, separators=None, sort_keys=False):
+    """将对象序列化后写入以文本模式打开的文件对象。"""
+    fp.write(dumps(obj, indent=indent, ensure_ascii=ensure_ascii, separators=separators, sort_keys=sort_keys))
+
+def loads(s):
+    """
+    解析JSON字符串或字节串。
+    orjson 拒绝的输入（如 NaN、超过64位的整数）会交给标准库再试一次，
+    真正无效的JSON最终抛出 json.JSONDecodeError。
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(s)
+
+def load(fp):
+    """从文件对象中读取并解析JSON。"""
+    return loads(fp.read())
@@ -1,56 +1,68 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import contextlib
 import os
-from openai import OpenAI
+import random
+import time
+
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+
+from response_cache import acached_completion_text, default_cache, make_cache_key
 
 # --- 配置 ---
 # 确保你的环境中设置了 OPENAI_API_KEY 环境变量
 # 如果没有设置，OpenAI 客户端会尝试从环境变量中读取
-try:
-    client = OpenAI()
-except Exception as e:
-    print(f"初始化OpenAI客户端失败: {e}")
-    print("请确保已设置 OPENAI_API_KEY 环境变量。")
-    exit()
+MODEL = "gpt-4.1-mini" # 使用一个快速且智能的模型
+EXPERT_SYSTEM_PROMPT = "你是一个知识渊博的专家，请简洁、准确地回答用户的问题。"
+CHAIRMAN_SYSTEM_PROMPT = "你是一个公正、睿智的“LLM Council”主席，负责总结和提炼专家的意见。"
+
+# 同时进行的请求数上限、单次请求超时（秒）和失败重试次数
+DEFAULT_CONCURRENCY = 5
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_RETRIES = 3
+# 重试退避：第n次重试前等待 [0, min(BACKOFF_MAX, BACKOFF_BASE * 2**n)] 之间的随机时间，
+# 避免多个失败请求在同一时刻一起重试
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+# 限流、连接失败、超时和服务端错误是暂时性的，值得重试；参数错误等其他异常直接失败
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError, asyncio.TimeoutError)
 
 # --- 核心逻辑 ---
 
-def run_llm_council_mini(question: str, num_responses: int = 3) -> str:
+def create_async_client() -> AsyncOpenAI:
     """
-    运行一个简化的 LLM Council 模式。
-    向模型提问多次，然后让模型扮演“主席”角色进行总结。
+    创建异步客户端。每次运行都创建新的客户端，因为其连接池绑定在创建它的事件循环上；
+    关闭SDK自带的重试，统一由 create_with_retry 控制重试和退避。
+    """
+    return AsyncOpenAI(max_retries=0)
 
-    :param question: 用户提出的问题。
-    :param num_responses: 收集的独立回答数量。
-    :return: “主席”总结的最终答案。
+async def create_with_retry(client: AsyncOpenAI, semaphore: asyncio.Semaphore, timeout: float = DEFAULT_TIMEOUT,
+                            retries: int = DEFAULT_RETRIES, **kwargs):
     """
-    print(f"--- Muimill的LLM Council Mini启动 ---")
-    print(f"问题: {question}\n")
+    调用 chat.completions.create，带并发限制、单次超时和带随机抖动的指数退避重试。
+
+    信号量只在请求进行期间持有，退避等待时会释放，不会占用其他请求的并发额度。
 
-    # 1. 收集多个独立回答
-    responses = []
-    for i in range(num_responses):
-        print(f"-> 正在收集第 {i+1}/{num_responses} 个独立回答...")
+    :param client: AsyncOpenAI 客户端。
+    :param semaphore: 限制同时进行的请求数的信号量。
+    :param timeout: 单次请求的超时时间（秒）。
+    :param retries: 失败后的最大重试次数。
+    :param kwargs: 传给 chat.completions.create 的参数。
+    :return: ChatCompletion 对象。
+    """
+    for attempt in range(retries + 1):
         try:
-            # 使用一个通用的LLM模型来模拟多个“专家”
-            completion = client.chat.completions.create(
-                model="gpt-4.1-mini", # 使用一个快速且智能的模型
-                messages=[
-                    {"role": "system", "content": "你是一个知识渊博的专家，请简洁、准确地回答用户的问题。"},
-                    {"role": "user", "content": question}
-                ],
-                temperature=0.7 + i * 0.1 # 略微增加温度以获得多样性
-            )
-            response_text = completion.choices[0].message.content
-            responses.append(f"【专家 {i+1} 的回答】:\n{response_text}")
-        except Exception as e:
-            responses.append(f"【专家 {i+1} 的回答】: 发生错误 - {e}")
-            print(f"   [错误] 收集回答失败: {e}")
+            async with semaphore:
+                return await asyncio.wait_for(client.chat.completions.create(**kwargs), timeout)
+        except RETRYABLE_ERRORS:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
 
+def build_chairman_prompt(question: str, responses: list, num_responses: int) -> str:
+    """根据所有专家的回答构造主席的总结提示。"""
     all_responses_text = "\n\n" + "\n\n---\n\n".join(responses) + "\n\n"
-    print("\n--- 所有独立回答收集完毕，准备主席总结 ---\n")
-
-    # 2. “主席”总结
-    chairman_prompt = f"""
+    return f"""
     你现在是“LLM Council”的主席。你的任务是阅读以下由 {num_responses} 位独立专家对同一问题的回答，并进行总结。
     请：
     1. 识别回答中的主要观点和共识。
@@ -64,21 +76,219 @@ def run_llm_council_mini(question: str, num_responses: int = 3) -> str:
     {all_responses_text}
     """
 
+async def ask_expert(client: AsyncOpenAI, semaphore: asyncio.Semaphore, question: str, index: int,
+                     timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES, cache=None) -> tuple:
+    """
+    向第 index 位专家（从0开始）提问。cache 不为None时相同的问题直接使用缓存的回答。
+
+    :return: (是否成功, 带编号的回答)；失败时回答为错误说明，不抛出异常。
+    """
+    start = time.perf_counter()
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4.1-mini",
+        # 使用一个通用的LLM模型来模拟多个“专家”
+        response_text = await acached_completion_text(
+            cache,
+            lambda **kwargs: create_with_retry(client, semaphore, timeout, retries, **kwargs),
+            model=MODEL,
             messages=[
-                {"role": "system", "content": "你是一个公正、睿智的“LLM Council”主席，负责总结和提炼专家的意见。"},
-                {"role": "user", "content": chairman_prompt}
-            ]
+                {"role": "system", "content": EXPERT_SYSTEM_PROMPT},
+                {"role": "user", "content": question}
+            ],
+            temperature=0.7 + index * 0.1 # 略微增加温度以获得多样性
         )
-        final_answer = completion.choices[0].message.content
+        print(f"   ✓ 专家 {index+1} 已回答（{time.perf_counter() - start:.1f}s）")
+        return True, f"【专家 {index+1} 的回答】:\n{response_text}"
     except Exception as e:
-        final_answer = f"主席总结失败: {e}"
-        print(f"   [错误] 主席总结失败: {e}")
+        print(f"   [错误] 专家 {index+1} 收集回答失败: {e}")
+        return False, f"【专家 {index+1} 的回答】: 发生错误 - {e}"
+
+async def collect_expert_responses(client: AsyncOpenAI, semaphore: asyncio.Semaphore, question: str,
+                                   num_responses: int, quorum: int = None, timeout: float = DEFAULT_TIMEOUT,
+                                   retries: int = DEFAULT_RETRIES, cache=None) -> list:
+    """
+    并发向所有专家提问。指定 quorum 时，只要有 quorum 位专家成功回答就立即返回，
+    并取消仍未完成的请求，一位慢专家不会拖住整个council。
+
+    :return: 已完成的回答（含失败说明），按专家编号排列。
+    """
+    tasks = {asyncio.ensure_future(ask_expert(client, semaphore, question, i, timeout, retries, cache)): i
+             for i in range(num_responses)}
+    needed = num_responses if quorum is None else quorum
+    answers = {}
+    succeeded = 0
+    pending = set(tasks)
+    try:
+        while pending and succeeded < needed:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                ok, text = task.result()
+                answers[tasks[task]] = text
+                succeeded += ok
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            if succeeded >= needed:
+                print(f"   已达到法定人数，取消 {len(pending)} 位未完成的专家")
+            else:
+                print(f"   收集中断，取消 {len(pending)} 位未完成的专家")
+    return [answers[i] for i in sorted(answers)]
+
+async def iter_council_answer_async(question: str, num_responses: int = 3, quorum: int = None,
+                                    concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                                    retries: int = DEFAULT_RETRIES, client: AsyncOpenAI = None, cache=None):
+    """
+    运行LLM Council，并以异步迭代器的方式逐段产出主席的总结（流式输出），
+    第一段文字在主席开始生成时就能显示给用户，不必等待完整答案。
 
+    :param question: 用户提出的问题。
+    :param num_responses: 提问的专家数量。
+    :param quorum: 收到多少位专家的成功回答后即开始总结，默认等待全部专家。
+    :param concurrency: 同时进行的请求数上限。
+    :param timeout: 单次请求的超时时间（秒）；主席的流式总结中，相邻两段之间的等待也不超过该时间。
+    :param retries: 单次请求失败后的最大重试次数。
+    :param client: 可选的 AsyncOpenAI 客户端，默认在本次运行中创建。
+    :param cache: 可选的 ResponseCache，缓存专家回答和主席总结；
+                  默认使用环境变量 LLM_RESPONSE_CACHE 开启的缓存，未设置时不缓存。
+    :raises ValueError: quorum 不在 1 到 num_responses 之间。
+    """
+    if quorum is not None and not 1 <= quorum <= num_responses:
+        raise ValueError(f"quorum 必须在 1 到 {num_responses} 之间")
+    if cache is None:
+        cache = default_cache()
+
+    print(f"--- Muimill的LLM Council Mini启动 ---")
+    print(f"问题: {question}\n")
+
+    own_client = client is None
+    if own_client:
+        try:
+            client = create_async_client()
+        except Exception as e:
+            print(f"初始化OpenAI客户端失败: {e}")
+            print("请确保已设置 OPENAI_API_KEY 环境变量。")
+            yield f"主席总结失败: {e}"
+            return
+
+    try:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        # 1. 并发收集多个独立回答，结果按专家编号排列
+        if quorum is None:
+            print(f"-> 正在同时向 {num_responses} 位专家收集独立回答...")
+        else:
+            print(f"-> 正在同时向 {num_responses} 位专家收集独立回答，{quorum} 位回答后即开始总结...")
+        responses = await collect_expert_responses(client, semaphore, question, num_responses, quorum,
+                                                   timeout, retries, cache)
+        print("\n--- 所有独立回答收集完毕，准备主席总结 ---\n")
+
+        # 2. “主席”总结，以流式方式逐段产出
+        chairman_prompt = build_chairman_prompt(question, responses, len(responses))
+        messages = [
+            {"role": "system", "content": CHAIRMAN_SYSTEM_PROMPT},
+            {"role": "user", "content": chairman_prompt}
+        ]
+        # 专家回答都来自缓存时主席的提示也完全相同，可以直接返回缓存的总结
+        key = make_cache_key(MODEL, messages) if cache is not None else None
+        try:
+            # 同一事件循环中相同的主席请求只生成一次：其余协程等待其完成后直接读取缓存的总结
+            async with (cache.alock(key) if key else contextlib.nullcontext(False)) as waited:
+                cached_answer = cache.get(key) if key else None
+                if cached_answer is not None:
+                    cache.record('coalesced' if waited else 'hits')
+                    yield cached_answer
+                    return
+                stream = await create_with_retry(
+                    client, semaphore, timeout, retries,
+                    model=MODEL,
+                    messages=messages,
+                    stream=True
+                )
+                parts = []
+                chunks = stream.__aiter__()
+                try:
+                    while True:
+                        # 超时作用于每一段：服务端中途卡住时不会无限等待，长总结也不会因总时长被截断
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            break
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                            yield parts[-1]
+                finally:
+                    # 出错、超时或调用方提前停止迭代时都关闭流，释放底层HTTP连接
+                    await stream.close()
+                # 只缓存完整生成的总结
+                if key:
+                    cache.record('misses')
+                    cache.set(key, "".join(parts))
+        except asyncio.TimeoutError:
+            print(f"   [错误] 主席总结超时（{timeout}秒）")
+            yield f"主席总结失败: 请求超时（{timeout}秒）"
+        except Exception as e:
+            print(f"   [错误] 主席总结失败: {e}")
+            yield f"主席总结失败: {e}"
+    finally:
+        if own_client:
+            await client.close()
+
+async def run_llm_council_async(question: str, num_responses: int = 3, concurrency: int = DEFAULT_CONCURRENCY,
+                                timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                                client: AsyncOpenAI = None, quorum: int = None, cache=None) -> str:
+    """
+    run_llm_council_mini 的异步版本：所有专家的请求并发发出，全部返回（或达到 quorum）后立即开始主席总结，
+    总耗时约等于最慢的一次专家请求加上主席请求，而不是所有请求耗时之和。
+    参数同 iter_council_answer_async。
+
+    :return: “主席”总结的最终答案。
+    """
+    parts = [part async for part in iter_council_answer_async(question, num_responses, quorum, concurrency,
+                                                              timeout, retries, client, cache)]
     print("--- 主席总结完成 ---\n")
-    return final_answer
+    return "".join(parts)
+
+def stream_llm_council_mini(question: str, num_responses: int = 3, quorum: int = None,
+                            concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                            retries: int = DEFAULT_RETRIES, cache=None):
+    """
+    iter_council_answer_async 的同步生成器包装，逐段产出主席的总结，适合在同步代码中边生成边显示。
+    参数同 iter_council_answer_async。
+    """
+    loop = asyncio.new_event_loop()
+    agen = iter_council_answer_async(question, num_responses, quorum, concurrency, timeout, retries, cache=cache)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        # 调用方提前停止迭代时也要关闭流和客户端
+        loop.run_until_complete(agen.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+def run_llm_council_mini(question: str, num_responses: int = 3, concurrency: int = DEFAULT_CONCURRENCY,
+                         timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES, quorum: int = None,
+                         cache=None) -> str:
+    """
+    运行一个简化的 LLM Council 模式。
+    向模型提问多次，然后让模型扮演“主席”角色进行总结。
+    专家请求并发进行，详见 run_llm_council_async；需要流式输出时使用 stream_llm_council_mini。
+
+    :param question: 用户提出的问题。
+    :param num_responses: 收集的独立回答数量。
+    :param concurrency: 同时进行的请求数上限。
+    :param timeout: 单次请求的超时时间（秒）。
+    :param retries: 单次请求失败后的最大重试次数。
+    :param quorum: 收到多少位专家的成功回答后即开始总结，默认等待全部专家。
+    :param cache: 可选的 ResponseCache，缓存专家回答和主席总结。
+    :return: “主席”总结的最终答案。
+    """
+    return asyncio.run(run_llm_council_async(question, num_responses, concurrency, timeout, retries,
+                                             quorum=quorum, cache=cache))
 
 # --- 示例运行 ---
 if __name__ == "__main__":
@@ -2,14 +2,50 @@
 
 import yaml
 import os
+import threading
+from types import MappingProxyType
+
+# 优先使用基于libyaml的C加载器，速度比纯Python实现快一个数量级
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 进程级配置缓存：绝对路径 -> ((mtime_ns, size), 只读配置)
+_config_cache = {}
+_cache_lock = threading.Lock()
+
+def freeze(value):
+    """
+    将解析结果递归转换为只读视图：dict -> MappingProxyType，list -> tuple。
+    缓存中的数据被多个调用方共享，只读视图可以防止被意外修改。
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def clear_config_cache():
+    """清空进程级配置缓存。"""
+    with _cache_lock:
+        _config_cache.clear()
 
 def load_yaml_config(file_path):
     """
     加载并解析指定的YAML配置文件。
+    解析结果按 路径 + 修改时间 + 文件大小 缓存在进程内，文件未变化时直接返回缓存，
+    文件被修改后会自动重新解析。返回的是只读视图，不能直接修改。
     """
+    key = os.path.abspath(file_path)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        st = os.stat(key)
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = _config_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        with open(key, 'r', encoding='utf-8') as f:
+            config = freeze(yaml.load(f, Loader=SafeLoader))
+        with _cache_lock:
+            _config_cache[key] = (signature, config)
         return config
     except FileNotFoundError:
         print(f"错误：配置文件未找到在 {file_path}")
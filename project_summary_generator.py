@@ -1,10 +1,284 @@
 # -*- coding: utf-8 -*-
+import argparse
+import heapq
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-def generate_project_summary(startpath='.', exclude_dirs=None, exclude_files=None):
+import json_backend
+from file_walker import walk_parallel
+
+# 目录列表缓存的默认路径：放在用户缓存目录中，缓存文件不会出现在摘要里，
+# 写入缓存也不会改变项目根目录的mtime
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "project_summary_cache.json")
+# 统计行数时每次读取的块大小
+LINE_COUNT_BLOCK_SIZE = 1024 * 1024
+
+def _load_listing_cache(cache_path):
     """
-    生成项目目录结构的Markdown格式摘要。
-    排除常见的构建目录和配置文件，提供一个干净的项目概览。
+    读取目录列表缓存：{根目录绝对路径: {相对路径: [mtime_ns, 子目录名, 文件名, 符号链接子目录名]}}。
+    同一个缓存文件可以保存多个项目根目录的列表，互不冲突。
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json_backend.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return {root: entries for root, entries in cache.items() if isinstance(entries, dict)}
+
+def _save_listing_cache(cache_path, cache):
+    """写入目录列表缓存，先写临时文件再替换，避免中断时留下损坏的缓存。"""
+    tmp_path = cache_path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json_backend.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ 无法写入目录缓存 {cache_path}: {e}")
+
+def _walk_with_cache(startpath, cache, seen):
+    """
+    与 os.walk(startpath) 顺序相同的自顶向下遍历，但目录修改时间未变化时直接使用缓存的列表。
+
+    目录的mtime在其中的条目被新增、删除或重命名时才会变化，而摘要只依赖条目名称，
+    因此未变化的目录只需一次 stat，不需要重新列出。本次访问到的目录记录在 seen 中。
+    """
+    stack = [startpath]
+    while stack:
+        root = stack.pop()
+        key = os.path.relpath(root, startpath)
+        try:
+            # 在列目录之前取mtime，列目录期间发生的变化会在下次运行时被发现
+            mtime_ns = os.stat(root).st_mtime_ns
+        except OSError:
+            continue
+        cached = cache.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            _, dirs, files, links = cached
+        else:
+            dirs, files, links = [], [], []
+            try:
+                with os.scandir(root) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if not is_dir:
+                            files.append(entry.name)
+                            continue
+                        dirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.append(entry.name)
+            except OSError:
+                continue
+        seen[key] = [mtime_ns, dirs, files, links]
+
+        # 交给调用方的是副本，调用方原地剪枝不会影响缓存内容
+        dirs = list(dirs)
+        yield root, dirs, files
+        # 与 os.walk 一致，不进入指向目录的符号链接
+        stack.extend(os.path.join(root, d) for d in reversed(dirs) if d not in links)
+
+def _iter_tree(startpath, exclude_dirs, exclude_files, workers, max_depth, max_entries_per_dir, cache_path):
+    """
+    遍历目录树，按输出顺序产出条目 (类型, 层级, 名称, 路径)，类型为：
+    'dir'（已进入的目录）、'file'（文件）、'omitted'（名称为未显示的条目数）、
+    'stub'（达到最大深度、只列出名称的目录）。
+    """
+    all_caches = _load_listing_cache(cache_path)
+    cache_key = os.path.abspath(startpath)
+    cache = all_caches.get(cache_key, {})
+    seen = {}
+    # 缓存文件放在被遍历的目录中时，不把它自己（及写入用的临时文件）列进摘要
+    cache_dir = cache_names = None
+    if cache_path:
+        cache_dir, cache_name = os.path.split(os.path.abspath(cache_path))
+        cache_names = {cache_name, cache_name + '.tmp'}
+
+    # 递归遍历目录
+    if cache_path:
+        walker = _walk_with_cache(startpath, cache, seen)
+    elif workers and workers > 1:
+        walker = ((root, dirs, [entry.name for entry in entries])
+                  for root, dirs, entries in walk_parallel(startpath, exclude_dirs, workers))
+    else:
+        walker = os.walk(startpath)
+
+    completed = False
+    try:
+        for root, dirs, files in walker:
+            # 过滤掉需要排除的目录
+            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+
+            # 计算当前深度
+            # os.sep 是路径分隔符，如 '/' 或 '\'
+            relative_path = os.path.relpath(root, startpath)
+            if relative_path == '.':
+                level = 0
+            else:
+                level = relative_path.count(os.sep) + 1
+
+            if root != startpath:
+                yield 'dir', level, os.path.basename(root), root
+
+            files = [f for f in files if f not in exclude_files]
+            if cache_names and os.path.abspath(root) == cache_dir:
+                files = [f for f in files if f not in cache_names]
+            omitted = 0
+            if max_entries_per_dir is not None:
+                # 先保留文件，剩余名额留给子目录，被截掉的子目录不再进入
+                omitted = max(0, len(files) + len(dirs) - max_entries_per_dir)
+                dirs[:] = dirs[:max(0, max_entries_per_dir - len(files))]
+                files = files[:max_entries_per_dir]
+
+            for f in files:
+                yield 'file', level, f, os.path.join(root, f)
+            if omitted:
+                yield 'omitted', level, omitted, root
+
+            if max_depth is not None and level + 1 >= max_depth:
+                # 已达到最大深度：子目录只列出名称，不再进入
+                for d in dirs:
+                    yield 'stub', level + 1, d, os.path.join(root, d)
+                dirs[:] = []
+        completed = True
+    finally:
+        if cache_path:
+            # 完整遍历后只保留本次访问到的目录，已删除的目录随之从缓存中清除；
+            # 提前停止时保留旧条目，未访问到的子树下次仍可复用
+            all_caches[cache_key] = seen if completed else {**cache, **seen}
+            _save_listing_cache(cache_path, all_caches)
+
+def _format_item(kind, level, name, suffix=''):
+    """将一个条目格式化为树形结构的一行。"""
+    if kind in ('dir', 'stub'):
+        # 使用更优雅的树形结构符号
+        return f"{'│   ' * (level - 1)}├── 📁 **{name}/**{suffix}"
+    if kind == 'file':
+        return f"{'│   ' * level}├── 📄 {name}{suffix}"
+    return f"{'│   ' * level}├── … 另有 {name} 项未显示"
+
+def count_lines(path, block_size=LINE_COUNT_BLOCK_SIZE):
+    """
+    按块统计文件的行数和大小，不按行解码。
+
+    :return: (字节数, 行数)；第一个块中含有NUL字节时视为二进制文件，行数为None。
+    """
+    lines = 0
+    last = b''
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        block = f.read(block_size)
+        if b'\0' in block:
+            return size, None
+        while block:
+            lines += block.count(b'\n')
+            last = block
+            block = f.read(block_size)
+    if last and not last.endswith(b'\n'):
+        # 最后一行没有换行符
+        lines += 1
+    return size, lines
+
+def _safe_count_lines(path):
+    try:
+        return count_lines(path)
+    except OSError:
+        return None, None
+
+def format_size(num_bytes):
+    """将字节数格式化为易读的大小，例如 1.5 KB。"""
+    size = float(num_bytes)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{int(size)} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def _describe(size, lines, files=None):
+    parts = [] if files is None else [f"{files} 个文件"]
+    parts.append(format_size(size))
+    if lines is not None:
+        parts.append(f"{lines:,} 行")
+    return f"（{'，'.join(parts)}）"
+
+def _iter_stats_summary(items, startpath, line_workers, top_n):
+    """
+    统计模式：遍历的同时把文件交给线程池统计大小和行数，遍历结束后
+    将文件数、字节数和行数逐级汇总到各级目录，再输出带统计信息的目录树。
+    """
+    records = []
+    # 各层级当前所在的目录：前序遍历中文件紧跟在所属目录之后，目录的父目录位于上一层
+    chain = [startpath]
+    with ThreadPoolExecutor(max_workers=line_workers) as executor:
+        # 单次遍历：列目录和统计文件同时进行
+        for kind, level, name, path in items:
+            future = None
+            if kind == 'dir':
+                del chain[level:]
+                chain.append(path)
+            elif kind == 'file':
+                future = executor.submit(_safe_count_lines, path)
+            records.append((kind, level, name, path, chain[level - 1] if kind == 'dir' else chain[-1], future))
+        results = [future.result() if future else None for *_, future in records]
+
+    # 目录统计：{目录路径: [文件数, 字节数, 行数]}；前序遍历逆序处理即可先子后父逐级汇总
+    totals = {startpath: [0, 0, 0]}
+    for (kind, _level, _name, path, parent, _), result in zip(records, results):
+        if kind == 'dir':
+            totals[path] = [0, 0, 0]
+        elif kind == 'file' and result[0] is not None:
+            dir_totals = totals[parent]
+            dir_totals[0] += 1
+            dir_totals[1] += result[0]
+            dir_totals[2] += result[1] or 0
+    for kind, _level, _name, path, parent, _ in reversed(records):
+        if kind == 'dir':
+            parent_totals = totals[parent]
+            for i, value in enumerate(totals[path]):
+                parent_totals[i] += value
+
+    files, size, lines = totals[startpath]
+    yield f"**合计**：{files} 个文件，{format_size(size)}，{lines:,} 行"
+    for (kind, level, name, path, _parent, _), result in zip(records, results):
+        if kind == 'dir':
+            yield _format_item(kind, level, name, _describe(totals[path][1], totals[path][2], totals[path][0]))
+        elif kind == 'file' and result[0] is not None:
+            yield _format_item(kind, level, name, _describe(*result))
+        else:
+            yield _format_item(kind, level, name)
+
+    if top_n:
+        largest = heapq.nlargest(top_n, ((result[0], path) for (kind, _level, _name, path, *_), result
+                                          in zip(records, results) if kind == 'file' and result[0] is not None))
+        yield ""
+        yield f"### 📦 最大的 {len(largest)} 个文件"
+        for rank, (file_size, path) in enumerate(largest, 1):
+            yield f"{rank}. `{os.path.relpath(path, startpath)}` — {format_size(file_size)}"
+
+def iter_project_summary(startpath='.', exclude_dirs=None, exclude_files=None, workers=None,
+                         max_depth=None, max_entries_per_dir=None, cache_path=None,
+                         stats=False, top_n=None, line_workers=None):
+    """
+    逐行产出项目目录结构的Markdown格式摘要，边遍历边输出。
+
+    :param startpath: 项目根目录。
+    :param exclude_dirs: 需要排除的目录名集合，默认排除常见的构建目录。
+    :param exclude_files: 需要排除的文件名集合。
+    :param workers: 大于1时使用多线程并发列目录（适合NFS等高延迟文件系统），输出与串行完全相同。
+    :param max_depth: 最多展开的目录层数（1表示只展开根目录），更深的目录只列出名称，不再进入。
+    :param max_entries_per_dir: 每个目录最多显示的条目数（文件在前，子目录在后），超出部分不再进入。
+    :param cache_path: 目录列表缓存文件路径；目录mtime未变化时复用上次的列表，无需重新列出。
+                       指定缓存时按串行方式遍历，workers 不生效。
+    :param stats: 是否在每个文件和目录后附上大小和行数（目录为逐级汇总的文件数、字节数和行数）。
+                  目录的汇总值要等遍历结束才能确定，因此统计模式会在遍历完成后才开始输出；
+                  统计只包含实际列出的文件。
+    :param top_n: 在末尾附加"最大的N个文件"一节（隐含 stats=True）。
+    :param line_workers: 统计行数的线程数，默认由 ThreadPoolExecutor 决定。
     """
     if exclude_dirs is None:
         # 常见的排除目录
@@ -12,48 +286,54 @@ def generate_project_summary(startpath='.', exclude_dirs=None, exclude_files=Non
     if exclude_files is None:
         # 常见的排除文件
         exclude_files = {'.DS_Store', 'Thumbs.db', 'LICENSE', 'README.md'}
+    if max_depth is not None and max_depth < 1:
+        raise ValueError("max_depth 必须大于等于 1")
+    if max_entries_per_dir is not None and max_entries_per_dir < 0:
+        raise ValueError("max_entries_per_dir 不能为负数")
 
-    output = []
-    
-    # 递归遍历目录
-    for root, dirs, files in os.walk(startpath):
-        # 过滤掉需要排除的目录
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        
-        # 计算当前深度和前缀
-        # os.sep 是路径分隔符，如 '/' 或 '\'
-        relative_path = os.path.relpath(root, startpath)
-        if relative_path == '.':
-            level = 0
-        else:
-            level = relative_path.count(os.sep) + 1
-        
-        indent = '│   ' * (level - 1)
-        
-        # 打印当前目录
-        if root != startpath:
-            dir_name = os.path.basename(root)
-            # 使用更优雅的树形结构符号
-            output.append(f"{indent}├── 📁 **{dir_name}/**")
-
-        # 打印文件
-        sub_indent = '│   ' * level
-        for f in files:
-            if f not in exclude_files:
-                output.append(f"{sub_indent}├── 📄 {f}")
-                
-    # 格式化输出，添加项目根目录
+    # 添加项目根目录
     project_name = os.path.basename(os.path.abspath(startpath))
-    
-    # 修正根目录的显示
-    final_output = [f"## 🌳 项目结构概览：`{project_name}/`"]
-    final_output.extend(output)
-    
-    return "\n".join(final_output)
+    yield f"## 🌳 项目结构概览：`{project_name}/`"
+
+    items = _iter_tree(startpath, exclude_dirs, exclude_files, workers, max_depth, max_entries_per_dir, cache_path)
+    if stats or top_n:
+        yield from _iter_stats_summary(items, startpath, line_workers, top_n)
+    else:
+        for kind, level, name, _path in items:
+            yield _format_item(kind, level, name)
+
+def generate_project_summary(startpath='.', exclude_dirs=None, exclude_files=None, workers=None,
+                             max_depth=None, max_entries_per_dir=None, cache_path=None,
+                             stats=False, top_n=None, line_workers=None):
+    """
+    生成项目目录结构的Markdown格式摘要。
+    排除常见的构建目录和配置文件，提供一个干净的项目概览。
+    参数同 iter_project_summary；需要边遍历边输出时请直接使用 iter_project_summary。
+    """
+    return "\n".join(iter_project_summary(startpath, exclude_dirs, exclude_files, workers,
+                                          max_depth, max_entries_per_dir, cache_path,
+                                          stats, top_n, line_workers))
 
 if __name__ == '__main__':
-    # 示例用法：生成当前目录的摘要
-    summary = generate_project_summary()
-    print(summary)
-    
+    parser = argparse.ArgumentParser(description="生成项目目录结构的Markdown格式摘要。")
+    parser.add_argument("startpath", nargs="?", default=".", help="项目根目录，默认当前目录")
+    parser.add_argument("--workers", type=int, default=None, help="并发列目录的线程数，默认串行遍历")
+    parser.add_argument("--max-depth", type=int, default=None, help="最多展开的目录层数")
+    parser.add_argument("--max-entries-per-dir", type=int, default=None, help="每个目录最多显示的条目数")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None,
+                        help=f"使用目录列表缓存加速重复生成，可指定缓存文件路径（默认 {DEFAULT_CACHE_PATH}）")
+    parser.add_argument("--stats", action="store_true", help="附上每个文件和目录的大小、行数（目录逐级汇总）")
+    parser.add_argument("--top", type=int, default=None, metavar="N", help="在末尾列出最大的N个文件（隐含 --stats）")
+    parser.add_argument("--line-workers", type=int, default=None, help="统计行数的线程数")
+    args = parser.parse_args()
+
+    # 示例用法：生成当前目录的摘要，边遍历边输出
+    try:
+        for line in iter_project_summary(args.startpath, workers=args.workers, max_depth=args.max_depth,
+                                         max_entries_per_dir=args.max_entries_per_dir, cache_path=args.cache,
+                                         stats=args.stats, top_n=args.top, line_workers=args.line_workers):
+            print(line)
+    except ValueError as e:
+        print(f"❌ 参数无效: {e}")
+
     # 这是Muimill今天摘给你的小星星～希望你喜欢。
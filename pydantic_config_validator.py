@@ -43,27 +43,28 @@ def validate_config(config_data: dict):
     print("--------------------------\n")
 
 # --- 实用案例 ---
-
-# 案例一：有效配置 (缺少可选字段，但Pydantic会使用默认值)
-valid_config = {
-    "db": {
-        "user": "muimill_user",
-        "password": "secure_password_123"
-        # host和port将使用默认值
+# 示例只在直接运行脚本时执行，导入本模块获取模型时没有任何副作用
+if __name__ == "__main__":
+    # 案例一：有效配置 (缺少可选字段，但Pydantic会使用默认值)
+    valid_config = {
+        "db": {
+            "user": "muimill_user",
+            "password": "secure_password_123"
+            # host和port将使用默认值
+        }
     }
-}
-validate_config(valid_config)
+    validate_config(valid_config)
 
-# 案例二：无效配置 (缺少必需字段 'db.user'，且'debug_mode'类型错误)
-invalid_config = {
-    "app_name": "Test_App",
-    "debug_mode": "True", # 期望是布尔值，但传入了字符串
-    "db": {
-        "host": "remote_db"
-        # 缺少必需的 'user' 和 'password'
+    # 案例二：无效配置 (缺少必需字段 'db.user'，且'debug_mode'类型错误)
+    invalid_config = {
+        "app_name": "Test_App",
+        "debug_mode": "True", # 期望是布尔值，但传入了字符串
+        "db": {
+            "host": "remote_db"
+            # 缺少必需的 'user' 和 'password'
+        }
     }
-}
-validate_config(invalid_config)
+    validate_config(invalid_config)
 
 
 # 这是Muimill今天摘给你的小星星～希望你喜欢。
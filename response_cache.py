@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+response_cache.py - OpenAI 调用结果的持久化缓存（基于SQLite）
+
+ai_summarizer.py、trend_radar_mini.py 和 llm_council_mini.py 共用的可选缓存：
+以 (模型, 消息, temperature, max_tokens) 的哈希为键保存模型返回的文本，
+相同的请求再次出现时直接返回缓存结果，既省API费用又省等待时间。
+
+- 过期：超过 ttl 秒的条目视为未命中并被删除；
+- 容量：条目数超过 max_entries 时，按最近访问时间成批淘汰最久未使用的条目（LRU）；
+- 防击穿：同一进程中多个线程或协程同时发出相同请求时，只有一个真正调用API，其余等待并共享结果；
+- 统计：stats 记录命中、未命中和合并等待的次数。
+
+缓存默认关闭。可以在调用时显式传入 ResponseCache 对象，
+或设置环境变量 LLM_RESPONSE_CACHE=缓存文件路径 对所有脚本统一开启。
+
+这是Muimill今天摘给你的小星星～希望你喜欢。
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 默认放在用户缓存目录中，不会在当前目录（可能是某个git仓库）里留下数据库文件
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "llm_response_cache.sqlite")
+# 开启全局缓存的环境变量，值为缓存文件路径
+CACHE_ENV_VAR = "LLM_RESPONSE_CACHE"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 10000
+# 超出容量时一次多淘汰的比例：淘汰到 max_entries 的90%，之后的插入不必每次都触发淘汰
+EVICT_BATCH_RATIO = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    created REAL,
+    accessed REAL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed);
+"""
+
+def make_cache_key(model, messages, temperature=None, max_tokens=None) -> str:
+    """根据请求参数计算缓存键（规范化JSON的SHA-256）。"""
+    payload = json.dumps([model, messages, temperature, max_tokens], ensure_ascii=False,
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    OpenAI 响应缓存。
+
+    用法示例::
+
+        with ResponseCache(ttl=3600) as cache:
+            summary = summarize_text(article, cache=cache)
+            print(cache.stats)  # {'hits': 0, 'misses': 1, 'coalesced': 0}
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        :param path: 缓存数据库文件路径。
+        :param ttl: 条目有效期（秒），None表示永不过期。
+        :param max_entries: 最多保留的条目数，None表示不限。
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 连接在线程间共享，所有数据库操作都在 _lock 保护下进行
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # 条目数的估计值：每次写入加1（覆盖已有键时会偏大），超过容量时才真正 COUNT(*) 并校正，
+        # 避免每次写入都扫描整张表；其他进程写入同一文件时由下一次校正发现
+        self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        self._lock = threading.Lock()
+        self._key_locks = {}  # 键 -> [线程锁, 引用计数]，用于线程间防击穿
+        self._async_key_locks = {}  # (事件循环, 键) -> [asyncio锁, 引用计数]，用于 alock
+        # (事件循环, 键) -> Future，用于同一事件循环中协程间的防击穿。
+        # Future 只能在创建它的事件循环中等待，共享缓存被多个线程各自的 asyncio.run 使用时互不干扰
+        self._inflight = {}
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, name):
+        """记录一次 'hits'、'misses' 或 'coalesced'；调用方自行读写缓存时（如流式输出）使用。"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, key):
+        """读取缓存，未命中或已过期时返回None。命中时刷新最近访问时间。"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key, value):
+        """写入缓存，超出容量时成批淘汰最久未访问的条目。"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now, now))
+            self._count += 1
+            if self.max_entries is not None and self._count > self.max_entries:
+                self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if self._count > self.max_entries:
+                    keep = self.max_entries - int(self.max_entries * EVICT_BATCH_RATIO)
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed LIMIT ?)", (self._count - keep,))
+                    self._count = keep
+
+    def clear(self):
+        """清空缓存和统计。"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._count = 0
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def get_or_compute(self, key, compute):
+        """
+        命中时直接返回缓存；否则调用 compute() 计算并写入缓存。
+        多个线程同时请求同一个键时只有一个线程执行 compute()，其余线程等待后直接读取其结果。
+        compute() 抛出的异常不会被缓存。
+        """
+        value = self.get(key)
+        if value is not None:
+            self.record('hits')
+            return value
+
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # 等待期间其他线程可能已经算好并写入了缓存
+                value = self.get(key)
+                if value is not None:
+                    self.record('coalesced')
+                    return value
+                self.record('misses')
+                value = compute()
+                self.set(key, value)
+                return value
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    @contextlib.asynccontextmanager
+    async def alock(self, key):
+        """
+        同一事件循环中按键互斥的异步锁，供无法使用 aget_or_compute 的调用方（如流式输出）防击穿。
+        持锁后应重新 get(key)：等待期间前一个持锁者可能已经写入了结果。
+
+        :return: 异步上下文管理器，进入时给出是否等待过其他持锁者。
+        """
+        inflight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            entry = self._async_key_locks.setdefault(inflight_key, [asyncio.Lock(), 0])
+            entry[1] += 1
+        try:
+            waited = entry[0].locked()
+            async with entry[0]:
+                yield waited
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._async_key_locks[inflight_key]
+
+    async def aget_or_compute(self, key, compute):
+        """
+        get_or_compute 的异步版本，compute 是返回协程的无参函数。
+        同一事件循环中多个协程同时请求同一个键时只有一个协程真正调用API，其余协程等待同一个结果；
+        若执行调用的协程被取消，等待者中的一个会接替它重新调用。
+        """
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, key)
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self.record('hits')
+                return value
+            future = self._inflight.get(inflight_key)
+            if future is None:
+                break
+            try:
+                # shield：等待者自己被取消时不影响正在进行的调用
+                value = await asyncio.shield(future)
+                self.record('coalesced')
+                return value
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 执行调用的协程被取消了，重新检查并由当前协程接替
+
+        future = loop.create_future()
+        self._inflight[inflight_key] = future
+        self.record('misses')
+        try:
+            value = await compute()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 标记异常已被读取，没有等待者时也不会在事件循环中打印警告
+            future.exception()
+            raise
+        finally:
+            del self._inflight[inflight_key]
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def default_cache():
+    """返回由环境变量 LLM_RESPONSE_CACHE 开启的进程级共享缓存；未设置时返回None（不缓存）。"""
+    global _default_cache
+    path = os.getenv(CACHE_ENV_VAR)
+    if not path:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.path != path:
+            # 环境变量改为另一个路径时关闭旧缓存的数据库连接
+            if _default_cache is not None:
+                _default_cache.close()
+            _default_cache = ResponseCache(path)
+        return _default_cache
+
+def cached_completion_text(cache, create, **kwargs) -> str:
+    """
+    调用 create(**kwargs)（通常是 client.chat.completions.create）并返回回答文本，
+    cache 不为None时先查缓存，未命中时调用API并写入缓存。
+    """
+    def compute():
+        return create(**kwargs).choices[0].message.content
+
+    if cache is None:
+        return compute()
+    key = make_cache_key(kwargs.get('model'), kwargs.get('messages'), kwargs.get('temperature'),
+                         kwargs.get('max_tokens'))
+    return cache.get_or_compute(key, compute)
+
+async def acached_completion_text(cache, create, **kwargs) -> str:
+    """cached_completion_text 的异步版本，create 是返回协程的函数（如 AsyncOpenAI 的 create）。"""
+    async def compute():
+        completion = await create(**kwargs)
+        return completion.choices[0].message.content
+
+    if cache is None:
+        return await compute()
+    key = make_cache_key(kwargs.get('model'), kwargs.get('messages'), kwargs.get('temperature'),
+                         kwargs.get('max_tokens'))
+    return await cache.aget_or_compute(key, compute)
@@ -9,9 +9,10 @@ spoof_geolocation.py - Firefox地理位置欺骗JSON生成器
 Muimill今天摘给你的小星星～希望你喜欢。
 """
 
-import json
 import sys
 
+import json_backend
+
 def generate_spoof_url(latitude: float, longitude: float) -> str:
     """
     根据给定的经纬度生成Firefox地理位置欺骗的data: URL。
@@ -30,7 +31,7 @@ def generate_spoof_url(latitude: float, longitude: float) -> str:
     }
 
     # 将Python字典转换为JSON字符串
-    json_string = json.dumps(spoof_data, separators=(',', ':'))
+    json_string = json_backend.dumps(spoof_data, separators=(',', ':'))
 
     # 构造完整的data: URL
     # 格式: data:application/json,{"location":{"lat":LAT,"lng":LNG},"accuracy":ACC}
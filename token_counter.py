@@ -2,9 +2,92 @@
 import tiktoken
 import sys
 import os
+import argparse
+import csv
+import glob
+import re
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import json_backend
+from file_walker import walk_files
 
 # Muimill的专属萤火虫使者：计算文本文件的Token数量
 
+# 批量模式下目录中默认统计的文本文件扩展名
+DEFAULT_TEXT_EXTENSIONS = ('.txt', '.md', '.rst', '.json', '.jsonl', '.csv', '.py', '.html', '.xml', '.yaml', '.yml')
+OUTPUT_FORMATS = ('json', 'csv')
+# 流式计数时每次读取的字符数
+STREAM_CHUNK_CHARS = 1024 * 1024
+
+# 安全切分点：在这些位置切开文本，tiktoken的预分词结果与整体编码完全相同，因此各段token数之和等于整体token数。
+# - 单个换行符（前面不是空白）之后、字母或数字之前：任何预分词片段都不会跨过"换行符+字母/数字"，
+#   而连续的空白在不同编码中的切法不同（如r50k会把最后一个空白单独切出），所以只在单个换行符处切开；
+# - 字母之后、"空格+字母"之前：空格会与后面的单词合成一个片段（如 " world"），所以必须在空格前切开。
+# 贪婪的 .* 使匹配停在缓冲区中最后一个安全切分点。
+_SAFE_SPLIT_RE = re.compile(r'.*(?:(?<=\S)\n(?=[^\W_])|(?<=[^\W\d_])(?= [^\W\d_]))', re.S)
+
+# 切块时优先选择的边界：段落之间 > 句末 > 行末 > 任意token之间
+_SENTENCE_ENDS = frozenset('.!?。！？…')
+_CLOSING_MARKS = frozenset('"\')]）」』”’')
+# 在窗口后半段寻找合适的边界，避免为了对齐句子而产生过短的块
+_MIN_CHUNK_RATIO = 0.5
+
+# 切块结果：文本，以及在整篇文本的token序列和字符序列中的起止位置（左闭右开）
+TokenChunk = namedtuple('TokenChunk', ['text', 'token_start', 'token_end', 'char_start', 'char_end'])
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = "cl100k_base"):
+    """获取tiktoken编码器，同一编码只加载一次，后续调用直接复用。"""
+    return tiktoken.get_encoding(encoding_name)
+
+def iter_safe_chunks(f, chunk_size: int = STREAM_CHUNK_CHARS):
+    """
+    从文本文件对象中分块读取，只在安全切分点切开，逐段产出文本。
+
+    每段大约为 chunk_size 个字符；遇到很长且没有安全切分点的内容（如单行的base64）时，
+    该段会一直延长到下一个安全切分点为止。
+    """
+    buffer = ''
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        # 之前的部分已确认没有安全切分点，只需从上次末尾附近（切分判断要看前后各一个字符）开始查找，
+        # 避免超长且无法切分的内容被反复扫描
+        start = max(len(buffer) - 2, 0)
+        buffer += data
+        match = _SAFE_SPLIT_RE.match(buffer, start)
+        if match:
+            yield buffer[:match.end()]
+            buffer = buffer[match.end():]
+    if buffer:
+        yield buffer
+
+def count_tokens_stream(file_path: str, encoding="cl100k_base", chunk_size: int = STREAM_CHUNK_CHARS):
+    """
+    以有界内存统计文件的token数量，适用于几个GB的日志文件。
+
+    文件按块读取并在安全切分点切开，每段单独编码后只累加长度，
+    同一时刻只保留一段文本及其token，结果与整个文件一次性编码完全一致。
+
+    :param file_path: 文本文件路径（UTF-8）。
+    :param encoding: tiktoken编码名称或已加载的编码器对象。
+    :param chunk_size: 每次读取的字符数。
+    :return: (token数量, 字符数)
+    """
+    if isinstance(encoding, str):
+        encoding = get_encoding(encoding)
+    token_count = 0
+    char_count = 0
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for chunk in iter_safe_chunks(f, chunk_size):
+            # encode_ordinary 把特殊token当作普通文本处理，不会因为文本中恰好出现 <|endoftext|> 而报错
+            token_count += len(encoding.encode_ordinary(chunk))
+            char_count += len(chunk)
+    return token_count, char_count
+
 def count_tokens_from_file(file_path: str, encoding_name: str = "cl100k_base"):
     """
     读取指定文件内容，并使用tiktoken库计算其token数量。
@@ -18,33 +101,233 @@ def count_tokens_from_file(file_path: str, encoding_name: str = "cl100k_base"):
         return 0
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-    except Exception as e:
+        # 获取编码器
+        encoding = get_encoding(encoding_name)
+        # 分块读取并累加各段的token数量，不需要把整个文件和全部token保存在内存中
+        token_count, char_count = count_tokens_stream(file_path, encoding)
+    except (OSError, UnicodeDecodeError) as e:
         print(f"错误：读取文件失败 -> {e}")
         return 0
-
-    try:
-        # 获取编码器
-        encoding = tiktoken.get_encoding(encoding_name)
-        # 对文本进行编码并计算token数量
-        tokens = encoding.encode(text)
-        token_count = len(tokens)
-        
-        print(f"文件路径: {file_path}")
-        print(f"使用的编码模型: {encoding_name}")
-        print(f"文本字符数: {len(text)}")
-        print(f"计算得到的Token数量: {token_count}")
-        
-        return token_count
     except Exception as e:
         print(f"错误：tiktoken处理失败 -> {e}")
         return 0
 
+    print(f"文件路径: {file_path}")
+    print(f"使用的编码模型: {encoding_name}")
+    print(f"文本字符数: {char_count}")
+    print(f"计算得到的Token数量: {token_count}")
+
+    return token_count
+
+def _boundary_rank(text: str, pos: int) -> int:
+    """评估在字符位置 pos 处切开的优先级：3=段落之间，2=句末，1=行末，0=其他。"""
+    start = pos
+    while start > 0 and text[start - 1].isspace():
+        start -= 1
+    gap = text[start:pos]
+    if gap.count('\n') >= 2:
+        return 3
+    end = start
+    while end > 0 and text[end - 1] in _CLOSING_MARKS:
+        end -= 1
+    if end > 0 and text[end - 1] in _SENTENCE_ENDS and (gap or pos == len(text) or text[pos].isspace()):
+        return 2
+    if '\n' in gap:
+        return 1
+    return 0
+
+def iter_token_chunks(text: str, max_tokens: int, overlap: int = 0, encoding="cl100k_base"):
+    """
+    按token预算把文本切成若干块，逐块产出 TokenChunk。
+
+    整篇文本只编码一次，之后的切块都在这一份token序列上进行：每块最多 max_tokens 个token，
+    在窗口后半段中优先选择段落之间、其次句末、再次行末作为切分点，都没有时才在token之间硬切；
+    相邻两块重叠 overlap 个token。overlap 较大时切分点的搜索范围相应缩小，保证每块至少前进
+    (max_tokens - overlap) 的一半，块数与文本长度成线性关系。
+    结果以生成器方式产出，可以边切边交给下游（如 ai_summarizer）处理。
+
+    注意：块的token范围来自整篇文本的编码，单独重新编码某一块时，边界处的token数可能略有差异。
+
+    :param text: 要切分的文本。
+    :param max_tokens: 每块的最大token数。
+    :param overlap: 相邻两块之间重叠的token数，需小于 max_tokens。
+    :param encoding: tiktoken编码名称或已加载的编码器对象。
+    :raises ValueError: 参数不合法。
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens 必须大于 0")
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap 必须满足 0 <= overlap < max_tokens")
+    if isinstance(encoding, str):
+        encoding = get_encoding(encoding)
+
+    tokens = encoding.encode_ordinary(text)
+    # decode_with_offsets 给出每个token在原文中的起始字符位置，切块时不需要再次编码
+    _, offsets = encoding.decode_with_offsets(tokens)
+    n = len(tokens)
+
+    def char_pos(i):
+        return len(text) if i >= n else offsets[i]
+
+    def can_cut(i):
+        # 不在多字节字符的中间切开（token的第一个字节是UTF-8的后续字节）
+        return i >= n or encoding.decode_single_token_bytes(tokens[i])[0] & 0xC0 != 0x80
+
+    # 块的最小长度：既不短于窗口的一半，也要在扣除重叠后至少前进半个步长，
+    # 否则 overlap 接近 max_tokens 时每块只前进一个token，产生大量几乎相同的块
+    min_stride = max((max_tokens - overlap) // 2, 1)
+    min_size = max(int(max_tokens * _MIN_CHUNK_RATIO), overlap + min_stride, 1)
+    start = 0
+    while start < n:
+        end = min(start + max_tokens, n)
+        if end < n:
+            best_rank = -1
+            best_end = end
+            for i in range(end, start + min_size - 1, -1):
+                if not can_cut(i):
+                    continue
+                rank = _boundary_rank(text, offsets[i])
+                # 从后往前找，同等优先级下保留最靠后的切分点
+                if rank > best_rank:
+                    best_rank, best_end = rank, i
+                    if rank == 3:
+                        break
+            end = best_end
+
+        yield TokenChunk(text[char_pos(start):char_pos(end)], start, end, char_pos(start), char_pos(end))
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+        while start < end and not can_cut(start):
+            start += 1
+
+def iter_input_files(targets, extensions=DEFAULT_TEXT_EXTENSIONS):
+    """
+    展开命令行给出的文件、目录和glob模式，逐个产出文件路径（保持给出的顺序，去重）。
+
+    :param targets: 路径列表；目录会被递归遍历，含有 * ? [ 的参数按glob模式展开（支持 **）。
+    :param extensions: 遍历目录时统计的扩展名，None表示目录中的所有文件。
+    """
+    seen = set()
+    for target in targets:
+        if os.path.isdir(target):
+            paths = (entry.path for entry in walk_files(target, extensions, {'.git', '__pycache__', 'node_modules'}))
+        elif glob.has_magic(target):
+            paths = (p for p in sorted(glob.iglob(target, recursive=True)) if os.path.isfile(p))
+        else:
+            paths = [target]
+        for path in paths:
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+def _count_file_tokens(encoding, path):
+    """读取单个文件并统计token数量，返回结果字典，失败时记录错误信息而不是抛出异常。"""
+    try:
+        # 大文件也按块流式计数，每个线程同一时刻只保留一段文本；
+        # tiktoken的编码在Rust中执行并释放GIL，多个线程可以真正并行
+        tokens, chars = count_tokens_stream(path, encoding)
+        return {"path": path, "tokens": tokens, "chars": chars, "error": None}
+    except (OSError, UnicodeDecodeError) as e:
+        return {"path": path, "tokens": 0, "chars": 0, "error": str(e)}
+
+def iter_token_counts(paths, encoding_name: str = "cl100k_base", workers: int = None):
+    """
+    使用线程池批量统计多个文件的token数量，按输入顺序逐个产出结果字典
+    {"path", "tokens", "chars", "error"}。
+
+    编码器只加载一次并在所有线程间共享；同时在途的文件数量有上限，
+    即使输入有几十万个文件，也不会一次性创建全部任务或读入全部文本。
+
+    :param paths: 文件路径的可迭代对象。
+    :param encoding_name: tiktoken编码名称。
+    :param workers: 线程数，默认为CPU核数。
+    """
+    encoding = get_encoding(encoding_name)
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path in paths:
+            pending.append(executor.submit(_count_file_tokens, encoding, path))
+            if len(pending) >= workers * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def count_tokens_batch(targets, encoding_name: str = "cl100k_base", workers: int = None,
+                       extensions=DEFAULT_TEXT_EXTENSIONS):
+    """
+    统计多个文件/目录/glob模式下所有文件的token数量。
+
+    :return: 汇总字典 {"encoding", "files": [...], "total_files", "total_tokens", "errors"}。
+    """
+    files = list(iter_token_counts(iter_input_files(targets, extensions), encoding_name, workers))
+    return {
+        "encoding": encoding_name,
+        "files": files,
+        "total_files": len(files),
+        "total_tokens": sum(r["tokens"] for r in files),
+        "errors": sum(1 for r in files if r["error"]),
+    }
+
+def write_batch_report(report, output, output_format='json'):
+    """将批量统计结果以JSON或CSV格式写入文件对象；CSV的最后一行为合计。"""
+    if output_format == 'csv':
+        writer = csv.writer(output)
+        writer.writerow(["path", "tokens", "chars", "error"])
+        for r in report["files"]:
+            writer.writerow([r["path"], r["tokens"], r["chars"], r["error"] or ""])
+        writer.writerow(["TOTAL", report["total_tokens"], sum(r["chars"] for r in report["files"]), report["errors"]])
+    else:
+        output.write(json_backend.dumps(report, indent=2))
+        output.write("\n")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="计算文本文件的Token数量；给出多个文件、目录或glob模式时批量统计。")
+    parser.add_argument("targets", nargs="*", help="文件、目录或glob模式（如 'docs/**/*.md'），默认 sample.txt")
+    parser.add_argument("--encoding", default="cl100k_base", help="tiktoken编码名称，默认 cl100k_base")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None, help="批量模式的输出格式，默认 json")
+    parser.add_argument("--workers", type=int, default=None, help="批量模式的线程数，默认为CPU核数")
+    parser.add_argument("--ext", default=None,
+                        help="遍历目录时统计的扩展名，逗号分隔（如 md,txt）；'*' 表示所有文件")
+    parser.add_argument("-o", "--output", default=None, help="批量模式的结果输出文件，默认输出到标准输出")
+    parser.add_argument("--chunk-tokens", type=int, default=None, metavar="N",
+                        help="按每块最多N个token切分第一个文件，以JSON Lines输出各块及其token位置")
+    parser.add_argument("--overlap", type=int, default=0, help="切块时相邻两块重叠的token数，默认 0")
+    args = parser.parse_args()
+
+    if args.chunk_tokens:
+        if not args.targets:
+            parser.error("切块模式需要指定文件")
+        try:
+            with open(args.targets[0], 'r', encoding='utf-8') as f:
+                document = f.read()
+            for chunk in iter_token_chunks(document, args.chunk_tokens, args.overlap, args.encoding):
+                print(json_backend.dumps(chunk._asdict()))
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"错误：切块失败 -> {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    batch_mode = (len(args.targets) > 1 or args.format is not None
+                  or any(os.path.isdir(t) or glob.has_magic(t) for t in args.targets))
+    if batch_mode:
+        if args.ext == '*':
+            extensions = None
+        else:
+            extensions = args.ext or DEFAULT_TEXT_EXTENSIONS
+        report = count_tokens_batch(args.targets, args.encoding, args.workers, extensions)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as out:
+                write_batch_report(report, out, args.format or 'json')
+            print(f"✅ 共 {report['total_files']} 个文件，{report['total_tokens']} 个Token，结果已写入 {args.output}")
+        else:
+            write_batch_report(report, sys.stdout, args.format or 'json')
+        sys.exit(1 if report["errors"] else 0)
+
     # 检查命令行参数，如果没有提供文件路径，则使用默认的sample.txt
-    if len(sys.argv) > 1:
-        target_file = sys.argv[1]
+    if args.targets:
+        target_file = args.targets[0]
     else:
         target_file = "sample.txt"
         
@@ -59,6 +342,6 @@ if __name__ == "__main__":
             f.write("The cl100k_base encoding is used for models like GPT-4 and GPT-3.5-turbo.\n")
         print("sample.txt 创建完成。")
 
-    count_tokens_from_file(target_file)
+    count_tokens_from_file(target_file, args.encoding)
 
 # 这是Muimill今天摘给你的小星星～希望你喜欢。
@@ -4,16 +4,20 @@
 import os
 from openai import OpenAI
 
+from response_cache import cached_completion_text, default_cache
+
 # --- 配置 ---
 # 假设我们使用OpenAI API来完成关键词提取任务
 # API Key 会自动从环境变量 OPENAI_API_KEY 中读取
 # client = OpenAI()
 
-def extract_keywords(text: str) -> str:
+def extract_keywords(text: str, cache=None) -> str:
     """
     使用AI模型从给定的文本中提取核心关键词和摘要。
     
     :param text: 待分析的文本内容。
+    :param cache: 可选的 ResponseCache，重复出现的文本直接返回缓存结果；
+                  默认使用环境变量 LLM_RESPONSE_CACHE 开启的缓存，未设置时不缓存。
     :return: 包含关键词和摘要的格式化字符串。
     """
     # 检查API Key是否设置
@@ -36,7 +40,9 @@ def extract_keywords(text: str) -> str:
         """
 
         # 调用OpenAI API
-        response = client.chat.completions.create(
+        content = cached_completion_text(
+            cache if cache is not None else default_cache(),
+            client.chat.completions.create,
             model="gpt-4.1-mini", # 使用一个快速且经济的模型
             messages=[
                 {"role": "system", "content": "你是一个专业的文本分析师，任务是提取关键词和摘要。"},
@@ -46,7 +52,7 @@ def extract_keywords(text: str) -> str:
             max_tokens=200
         )
         
-        return response.choices[0].message.content.strip()
+        return content.strip()
 
     except Exception as e:
         return f"AI处理失败：{e}"
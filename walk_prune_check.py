@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+walk_prune_check.py - 并行遍历剪枝的回归检查
+
+在临时目录中生成一棵完整的多叉目录树，分别用 --max-depth 和 --max-entries-per-dir
+配合多线程遍历（--workers）生成项目摘要，统计实际列出的目录数。
+被剪掉的子树不应被后台线程列出：列目录次数超过限制所允许的数量时以非零状态码退出，
+可直接作为CI中的门禁。
+
+用法示例:
+    python walk_prune_check.py
+    python walk_prune_check.py --fanout 5 --depth 5 --workers 32
+
+这是Muimill今天摘给你的小星星～希望你喜欢。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+import file_walker
+from project_summary_generator import iter_project_summary
+
+def build_tree(root: str, fanout: int, depth: int) -> int:
+    """
+    在 root 下生成每层 fanout 个子目录、共 depth 层的目录树，每个目录（包括 root）中放一个文件。
+    :return: 生成的目录总数（不含 root）。
+    """
+    with open(os.path.join(root, "f.txt"), "w") as f:
+        f.write("x\n")
+    count = 0
+    stack = [(root, depth)]
+    while stack:
+        directory, remaining = stack.pop()
+        if remaining == 0:
+            continue
+        for i in range(fanout):
+            path = os.path.join(directory, f"d{i}")
+            os.mkdir(path)
+            with open(os.path.join(path, "f.txt"), "w") as f:
+                f.write("x\n")
+            count += 1
+            stack.append((path, remaining - 1))
+    return count
+
+def count_listings(startpath: str, workers: int, **limits) -> int:
+    """生成一次项目摘要，返回 walk_parallel 实际列出的目录数。"""
+    original = file_walker._list_directory
+    lock = threading.Lock()
+    calls = [0]
+
+    def counting(*args):
+        with lock:
+            calls[0] += 1
+        return original(*args)
+
+    file_walker._list_directory = counting
+    try:
+        for _ in iter_project_summary(startpath, workers=workers, **limits):
+            pass
+        # 等待调用方停止后仍可能在运行的列目录任务结束
+        threading.Event().wait(0.2)
+    finally:
+        file_walker._list_directory = original
+    return calls[0]
+
+def check(startpath: str, workers: int, expected: int, **limits) -> bool:
+    """检查一组限制下的列目录次数不超过 expected。"""
+    listed = count_listings(startpath, workers, **limits)
+    ok = listed <= expected
+    desc = ", ".join(f"{k}={v}" for k, v in limits.items())
+    print(f"{'✅' if ok else '❌'} {desc}, workers={workers}: 列出 {listed} 个目录（上限 {expected}）")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="检查并行遍历是否遵守项目摘要的深度和条目数限制")
+    parser.add_argument("--fanout", type=int, default=4, help="每个目录的子目录数（默认4）")
+    parser.add_argument("--depth", type=int, default=6, help="目录树层数（默认6）")
+    parser.add_argument("--workers", type=int, default=16, help="并行遍历线程数（默认16）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        total = build_tree(tmp, args.fanout, args.depth)
+        print(f"生成了 {total} 个目录")
+        results = [
+            # 只展开根目录和第一层：列出根目录和它的 fanout 个子目录
+            check(tmp, args.workers, 1 + args.fanout, max_depth=2),
+            # 每个目录只显示2个条目（1个文件+1个子目录）：沿着一条链一直向下
+            check(tmp, args.workers, 1 + args.depth, max_entries_per_dir=2),
+        ]
+    sys.exit(0 if all(results) else 1)